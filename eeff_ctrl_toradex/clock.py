@@ -0,0 +1,29 @@
+import time as _time
+
+# --- Relógio do loop de controle ---
+# eeff_ctrl_toradex.py lê o tempo e dorme através deste módulo. Na execução normal são
+# as funções de 'time'; o simulador (simulator.py) instala um relógio virtual para
+# rodar milhares de ciclos sem esperar os timeouts e reenvios em tempo real.
+
+_time_fn = _time.time
+_sleep_fn = _time.sleep
+
+
+def time():
+    return _time_fn()
+
+
+def sleep(seconds):
+    _sleep_fn(seconds)
+
+
+def install(time_fn, sleep_fn):
+    """Substitui o relógio (usado pelo simulador)."""
+    global _time_fn, _sleep_fn
+    _time_fn = time_fn
+    _sleep_fn = sleep_fn
+
+
+def reset():
+    """Volta ao relógio real."""
+    install(_time.time, _time.sleep)
@@ -4,6 +4,12 @@ from datetime import datetime
 import gpiod
 import sys
 import select
+import os
+import realtime
+import flight_recorder
+import vacuum_sensor
+import status_page
+import clock
 
 # --- Configuração UART Toradex ---
 SERIAL_PORT = "/dev/verdin-uart1"
@@ -57,16 +63,34 @@ should_print_status = False
 # --- NOVAS CONSTANTES PARA TIMEOUT E REENVIO ---
 COMMAND_TIMEOUT_SECONDS = 5  # Tempo limite para o sensor responder
 RETRY_DELAY_SECONDS = 1      # Tempo para aguardar antes de reenviar o comando
+LOOP_SLEEP_SECONDS = 0.05    # Pausa ao fim de cada iteração do loop
+
+# --- Modo tempo real (opcional, via EEFF_REALTIME=1) ---
+REALTIME_CONFIG = realtime.config_from_env()
+
+# --- Flight recorder das fases do loop (sempre ativo) ---
+FLIGHT_CONFIG = flight_recorder.config_from_env()
+
+# --- Confirmação analógica de vácuo via ADS1115 (opcional, via EEFF_ANALOG_VACUUM=1) ---
+VACUUM_CONFIG = vacuum_sensor.config_from_env()
+
+# --- Página de status em memória compartilhada (vazio desativa) ---
+STATUS_PAGE_PATH = os.environ.get("EEFF_STATUS_PAGE", status_page.DEFAULT_PATH)
+
+# Último byte de feedback recebido pela UART e quando chegou (monotonic ns), publicados na página de status
+last_feedback_byte = 0
+last_feedback_ns = 0
 
 # Dicionário para rastrear o estado de cada comando que PRECISA de feedback
 # A chave é o offset da GPIO, o valor é um dicionário com:
 # 'pending': True se um comando foi enviado e estamos aguardando feedback
 # 'start_time': Timestamp de quando o comando foi enviado
 # 'original_command_type': 'ACTIVE' or 'INACTIVE' - stores the state that was initially commanded to retry later
+# 'command_monotonic': time.monotonic() do último envio, comparado com as amostras do ADS1115
 command_states = {
-    GPIO_LINE_OFFSETS[2]: {'pending': False, 'start_time': None, 'original_command_type': None}, # Vácuo Inferior
-    GPIO_LINE_OFFSETS[3]: {'pending': False, 'start_time': None, 'original_command_type': None}, # Cilindro
-    GPIO_LINE_OFFSETS[4]: {'pending': False, 'start_time': None, 'original_command_type': None}  # Vácuo Superior
+    GPIO_LINE_OFFSETS[2]: {'pending': False, 'start_time': None, 'original_command_type': None, 'command_monotonic': None}, # Vácuo Inferior
+    GPIO_LINE_OFFSETS[3]: {'pending': False, 'start_time': None, 'original_command_type': None, 'command_monotonic': None}, # Cilindro
+    GPIO_LINE_OFFSETS[4]: {'pending': False, 'start_time': None, 'original_command_type': None, 'command_monotonic': None}  # Vácuo Superior
 }
 
 # Função para configurar e controlar o GPIO
@@ -95,6 +119,14 @@ def setup_gpios():
 ser = None
 gpio_chip = None
 gpio_request = None
+pressure_sampler = None
+status_writer = None
+loop_wakeup = realtime.WakeupJitter(sleep_fn=clock.sleep)
+idle_collector = realtime.IdleCollector(REALTIME_CONFIG["gc_idle_interval"], REALTIME_CONFIG["gc_full_every"],
+                                        REALTIME_CONFIG["gc_max_busy"])
+flight = flight_recorder.FlightRecorder(FLIGHT_CONFIG["capacity"], FLIGHT_CONFIG["dump_dir"], FLIGHT_CONFIG["window"],
+                                        FLIGHT_CONFIG["max_files"])
+flight_record_cost_ns = flight_recorder.measure_record_cost()
 
 try:
     ser = serial.Serial(SERIAL_PORT, BAUD_RATE, 8, 'N', 1, timeout=0.1)
@@ -104,6 +136,17 @@ try:
     if gpio_chip is None or gpio_request_context is None:
         raise Exception("Falha ao configurar GPIOs. Saindo.")
 
+    status_writer = status_page.open_writer(STATUS_PAGE_PATH)
+    if status_writer is not None:
+        print(f"Página de status publicada em {STATUS_PAGE_PATH}.")
+
+    if VACUUM_CONFIG["enabled"]:
+        try:
+            pressure_sampler = vacuum_sensor.start_sampler(VACUUM_CONFIG)
+            print(f"Confirmação analógica de vácuo ativa (ADS1115 {VACUUM_CONFIG['address']:#04x} em {VACUUM_CONFIG['bus']}).")
+        except Exception as e:
+            print(f"Erro ao iniciar o ADS1115: {e}. Usando apenas o sensor digital.")
+
     with gpio_request_context as request:
         print("Controle de Atuadores. Pressione:")
         print("1 - Tool Changer (TRAVAR/DESTRAVAR)")
@@ -119,13 +162,43 @@ try:
             print(f"Cilindro: {cilindro_internal_state}")
             print(f"Vácuo superior: {vac_superior_internal_state}")
 
+        # Publica o estado atual na página de status em memória compartilhada
+        def publish_status():
+            if status_writer is None:
+                return
+            pending_mask = 0
+            for key, line_offset in GPIO_LINE_OFFSETS.items():
+                if line_offset in command_states and command_states[line_offset]['pending']:
+                    pending_mask |= 1 << key
+            status_writer.publish(
+                [tool_changer_internal_state, vac_inferior_internal_state, cilindro_internal_state, vac_superior_internal_state],
+                [1 if current_gpio_output_states[line_offset] == gpiod.line.Value.ACTIVE else 0 for line_offset in GPIO_LINE_OFFSETS.values()],
+                pending_mask,
+                last_feedback_byte,
+                last_feedback_ns,
+            )
+
         # Imprime o status inicial uma vez
         timestamp = datetime.now().strftime("%H:%M:%S")
         print(f"\n{timestamp}: Status Inicial:")
         print_current_status_to_console()
+        publish_status()
+
+        # Ativa o modo tempo real depois da inicialização, medindo o jitter antes e depois
+        if REALTIME_CONFIG["enabled"]:
+            jitter_before = realtime.measure_wakeup_jitter()
+            applied = realtime.enable_realtime(REALTIME_CONFIG["cpu"], REALTIME_CONFIG["priority"])
+            jitter_after = realtime.measure_wakeup_jitter()
+            print(f"Modo tempo real: {applied}")
+            print(f"Jitter de wake-up antes:  {realtime.format_jitter(jitter_before)}")
+            print(f"Jitter de wake-up depois: {realtime.format_jitter(jitter_after)}")
+
+        flight.install_signal_handler() # kill -USR1 <pid> grava o flight recorder
+        print(f"Flight recorder ativo ({flight_record_cost_ns:.0f} ns por registro, dumps em {FLIGHT_CONFIG['dump_dir']}).")
 
         while True:
-            current_loop_time = time.time()
+            current_loop_time = clock.time()
+            phase_start = flight.now()
 
             # --- Leitura do Teclado para Controlar GPIOs da Toradex ---
             rlist, _, _ = select.select([sys.stdin], [], [], 0)
@@ -158,6 +231,7 @@ try:
                             if new_gpio_state == gpiod.line.Value.ACTIVE: # Only start timeout for "turn on" commands
                                 state_entry['pending'] = True
                                 state_entry['start_time'] = current_loop_time
+                                state_entry['command_monotonic'] = time.monotonic()
                                 state_entry['original_command_type'] = gpiod.line.Value.ACTIVE # Store original command
                                 if pin_num_selected == 2:
                                     vac_inferior_internal_state = COMPONENT_STATUS[line_offset_to_control]["PENDING_ON"]
@@ -189,11 +263,16 @@ try:
                     print("Saindo...")
                     break
 
+            phase_start = flight.record(flight_recorder.PHASE_INPUT, phase_start)
+
             # --- Leitura da UART (vindo do Raspberry Pi) ---
             data_byte = ser.read(1) # Lê 1 byte
+            phase_start = flight.record(flight_recorder.PHASE_UART_READ, phase_start)
             if data_byte:
                 int_value = int.from_bytes(data_byte, 'big')
                 bit_string = bin(int_value)[2:].zfill(4)
+                last_feedback_byte = int_value
+                last_feedback_ns = time.monotonic_ns()
 
                 # ATENÇÃO: Armazena o estado ANTIGO das variáveis INTERNAS antes de atualizá-las
                 old_tool_changer_state = tool_changer_internal_state
@@ -259,6 +338,26 @@ try:
                     vac_superior_internal_state != old_vac_superior_state):
                     should_print_status = True # Sinaliza para imprimir o status
 
+            # --- Confirmação analógica de vácuo (ADS1115) ---
+            # Confirma antes do bit digital quando a curva de pressão cruza o limiar depois do comando
+            if pressure_sampler is not None:
+                if (command_states[GPIO_LINE_OFFSETS[2]]['pending'] and
+                        pressure_sampler.achieved_since(vacuum_sensor.VACUUM_CHANNELS[2],
+                                                        command_states[GPIO_LINE_OFFSETS[2]]['command_monotonic'])):
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Vácuo Inferior: Sensor analógico confirmou acionamento.")
+                    vac_inferior_internal_state = COMPONENT_STATUS[GPIO_LINE_OFFSETS[2]]["ON"]
+                    command_states[GPIO_LINE_OFFSETS[2]]['pending'] = False
+                    should_print_status = True
+                if (command_states[GPIO_LINE_OFFSETS[4]]['pending'] and
+                        pressure_sampler.achieved_since(vacuum_sensor.VACUUM_CHANNELS[4],
+                                                        command_states[GPIO_LINE_OFFSETS[4]]['command_monotonic'])):
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Vácuo Superior: Sensor analógico confirmou acionamento.")
+                    vac_superior_internal_state = COMPONENT_STATUS[GPIO_LINE_OFFSETS[4]]["ON"]
+                    command_states[GPIO_LINE_OFFSETS[4]]['pending'] = False
+                    should_print_status = True
+
+            phase_start = flight.record(flight_recorder.PHASE_DECODE, phase_start)
+
             # --- Lógica de Timeout e Reenvio ---
             for line_offset, state in command_states.items():
                 if state['pending']: # Only process if a command is pending feedback
@@ -276,6 +375,11 @@ try:
                         print(f"\n[{timestamp}] TIMEOUT: {component_name} não respondeu após {COMMAND_TIMEOUT_SECONDS}s.")
                         sys.stdout.flush()
 
+                        # Grava as fases que antecederam o timeout
+                        flight.record(flight_recorder.PHASE_TIMEOUT_SCAN, phase_start)
+                        flight.dump("timeout")
+                        phase_start = flight.now()
+
                         # --- First part: Reset the bit to zero ---
                         print(f"[{timestamp}] DEBUG: Setting GPIO {line_offset} to INACTIVE (0) for reset.")
                         request.set_value(line_offset, gpiod.line.Value.INACTIVE)
@@ -291,11 +395,14 @@ try:
                             timestamp = datetime.now().strftime("%H:%M:%S")
                             print(f"\n{timestamp}: Status Atual:")
                             print_current_status_to_console()
+                            publish_status()
                             should_print_status = False # Reset immediately after printing
 
                         # --- Wait for RETRY_DELAY_SECONDS ---
-                        time.sleep(RETRY_DELAY_SECONDS)
-                        current_loop_time = time.time() # Update time after sleep for accurate timestamping
+                        phase_start = flight.record(flight_recorder.PHASE_TIMEOUT_SCAN, phase_start)
+                        clock.sleep(RETRY_DELAY_SECONDS)
+                        phase_start = flight.record(flight_recorder.PHASE_RETRY_SLEEP, phase_start)
+                        current_loop_time = clock.time() # Update time after sleep for accurate timestamping
 
                         # --- Second part: Re-send the command ---
                         print(f"[{datetime.now().strftime('%H:%M:%S')}] Reenviando comando para {component_name}.")
@@ -309,6 +416,7 @@ try:
                             # Reset pending state and timer for the *new* attempt
                             state['pending'] = True # It's now pending again after re-send
                             state['start_time'] = current_loop_time # Reset timer for the new attempt
+                            state['command_monotonic'] = time.monotonic()
 
                             # Update internal state for component to PENDING again
                             if line_offset == GPIO_LINE_OFFSETS[2]:
@@ -322,18 +430,32 @@ try:
 
                         should_print_status = True # Force a status print after retry
                         # The loop will continue, and this pending state will be monitored again.
+                        # A espera e o reenvio ficam no buffer e entram no próximo dump.
+
 
+            phase_start = flight.record(flight_recorder.PHASE_TIMEOUT_SCAN, phase_start)
 
             # Imprime o status APENAS se houver mudança
             if should_print_status:
                 timestamp = datetime.now().strftime("%H:%M:%S")
                 print(f"\n{timestamp}: Status Atual:")
                 print_current_status_to_console()
+                publish_status()
 
                 # Reseta a flag após imprimir
                 should_print_status = False
+            elif data_byte:
+                publish_status() # Sem mudança de estado, mas o último feedback mudou
+
+            phase_start = flight.record(flight_recorder.PHASE_STATUS_OUTPUT, phase_start)
+
+            # Coleta de lixo só em janelas ociosas (nada recebido e nenhum comando pendente)
+            loop_idle = not rlist and not data_byte and not any(state['pending'] for state in command_states.values())
+            idle_collector.maybe_collect(loop_idle)
+            phase_start = flight.record(flight_recorder.PHASE_GC, phase_start)
 
-            time.sleep(0.05) # Small pause to prevent high CPU in the loop.
+            loop_wakeup.sleep(LOOP_SLEEP_SECONDS) # Small pause to prevent high CPU in the loop.
+            flight.record(flight_recorder.PHASE_LOOP_SLEEP, phase_start)
 
 except serial.SerialException as e:
     print(f"Erro ao abrir ou usar a porta serial: {e}")
@@ -343,10 +465,17 @@ except Exception as e:
 except KeyboardInterrupt:
     print("Recepção interrompida pelo usuário.")
 finally:
+    if pressure_sampler is not None:
+        pressure_sampler.stop()
+        print(f"Amostrador ADS1115 parado ({pressure_sampler.samples_read} amostras, {pressure_sampler.errors} erros).")
+    if status_writer is not None:
+        status_writer.close()
     if 'ser' in locals() and ser.is_open:
         ser.close()
         print("Porta serial fechada.")
     if gpio_chip:
         gpio_chip.close()
         print("GPIO chip fechado.")
+    print(f"Jitter de wake-up do loop: {realtime.format_jitter(loop_wakeup.summary())}")
+    print(f"Overhead do flight recorder: {flight.overhead_ratio(flight_record_cost_ns) * 100:.3f}% do tempo de loop")
     print("Programa encerrado.")
\ No newline at end of file
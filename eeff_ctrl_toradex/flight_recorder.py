@@ -0,0 +1,212 @@
+import json
+import os
+import signal
+import sys
+import time
+from array import array
+from datetime import datetime
+
+import stats
+
+# --- Flight recorder das fases do loop de controle ---
+# Cada fase do loop grava (fase, início, duração) em um buffer circular de tamanho fixo,
+# pré-alocado, usando perf_counter_ns. Em um TIMEOUT ou sinal (SIGUSR1) os últimos
+# segundos são gravados em arquivo JSON (só os max_files mais recentes são mantidos)
+# para análise com:
+#   python3 flight_recorder.py <dump.json> [<dump.json> ...]
+
+PHASE_INPUT = 0         # Leitura do teclado (stdin)
+PHASE_UART_READ = 1     # ser.read()
+PHASE_DECODE = 2        # Decodificação do byte de feedback
+PHASE_TIMEOUT_SCAN = 3  # Verificação de timeout e reenvio
+PHASE_RETRY_SLEEP = 4   # Espera RETRY_DELAY_SECONDS antes do reenvio
+PHASE_STATUS_OUTPUT = 5 # Impressão do status
+PHASE_LOOP_SLEEP = 6    # Pausa ao fim da iteração
+PHASE_GC = 7            # Coleta de lixo manual (modo tempo real)
+
+PHASE_NAMES = [
+    "input",
+    "uart_read",
+    "decode",
+    "timeout_scan",
+    "retry_sleep",
+    "status_output",
+    "loop_sleep",
+    "gc",
+]
+
+DEFAULT_CAPACITY = 65536           # Entradas no buffer (~8 por iteração, ~7 min a 20 Hz)
+DEFAULT_DUMP_WINDOW_SECONDS = 30   # Quantos segundos são gravados em cada dump
+DEFAULT_DUMP_DIR = "/tmp/eeff_flight"
+DEFAULT_MAX_FILES = 20             # Dumps mantidos em dump_dir; os mais antigos são apagados
+
+
+def config_from_env():
+    """Lê a configuração do flight recorder das variáveis de ambiente."""
+    return {
+        "dump_dir": os.environ.get("EEFF_FLIGHT_DIR", DEFAULT_DUMP_DIR),
+        "window": float(os.environ.get("EEFF_FLIGHT_WINDOW", DEFAULT_DUMP_WINDOW_SECONDS)),
+        "capacity": int(os.environ.get("EEFF_FLIGHT_CAPACITY", DEFAULT_CAPACITY)),
+        "max_files": int(os.environ.get("EEFF_FLIGHT_MAX_FILES", DEFAULT_MAX_FILES)),
+    }
+
+
+class FlightRecorder:
+    def __init__(self, capacity=DEFAULT_CAPACITY, dump_dir=DEFAULT_DUMP_DIR, window_seconds=DEFAULT_DUMP_WINDOW_SECONDS,
+                 max_files=DEFAULT_MAX_FILES):
+        self.capacity = capacity
+        self.dump_dir = dump_dir
+        self.max_files = max(1, max_files)
+        self.window_ns = int(window_seconds * 1e9)
+        # Arrays pré-alocados: nenhuma alocação por registro no caminho quente
+        self.phases = array("B", bytes(capacity))
+        self.starts = array("q", bytes(8 * capacity))
+        self.durations = array("q", bytes(8 * capacity))
+        self.index = 0
+        self.count = 0
+        self.created_ns = time.perf_counter_ns()
+
+    @staticmethod
+    def now():
+        return time.perf_counter_ns()
+
+    def record(self, phase, start_ns):
+        """Registra a fase que começou em start_ns e terminou agora. Retorna o instante atual."""
+        end_ns = time.perf_counter_ns()
+        i = self.index
+        self.phases[i] = phase
+        self.starts[i] = start_ns
+        self.durations[i] = end_ns - start_ns
+        self.index = (i + 1) % self.capacity
+        self.count += 1
+        return end_ns
+
+    def snapshot(self, window_ns=None):
+        """Devolve as entradas dos últimos window_ns, em ordem cronológica."""
+        window_ns = self.window_ns if window_ns is None else window_ns
+        stored = min(self.count, self.capacity)
+        first = (self.index - stored) % self.capacity
+        cutoff = time.perf_counter_ns() - window_ns
+        entries = []
+        for n in range(stored):
+            i = (first + n) % self.capacity
+            if self.starts[i] >= cutoff:
+                entries.append((self.phases[i], self.starts[i], self.durations[i]))
+        return entries
+
+    def dump(self, reason):
+        """Grava a janela recente em um arquivo JSON e retorna o caminho (ou None em caso de erro).
+
+        Com dump_dir vazio os dumps ficam desativados (usado pelo simulador).
+        """
+        if not self.dump_dir:
+            return None
+        entries = self.snapshot()
+        base_ns = entries[0][1] if entries else 0
+        data = {
+            "reason": reason,
+            "timestamp": datetime.now().isoformat(timespec="milliseconds"),
+            "window_s": self.window_ns / 1e9,
+            # perf_counter_ns absoluto de start_us = 0: permite juntar dumps sobrepostos
+            "base_ns": base_ns,
+            "phases": PHASE_NAMES,
+            "entries": [
+                {"phase": PHASE_NAMES[phase], "start_us": (start - base_ns) / 1000, "duration_us": duration / 1000}
+                for phase, start, duration in entries
+            ],
+        }
+        path = os.path.join(self.dump_dir, f"flight_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{reason}.json")
+        try:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(data, f)
+        except OSError as e:
+            print(f"Erro ao gravar flight recorder: {e}")
+            return None
+        print(f"Flight recorder gravado em {path} ({len(entries)} registros, motivo: {reason}).")
+        self.rotate()
+        return path
+
+    def rotate(self):
+        """Apaga os dumps mais antigos, mantendo os max_files mais recentes."""
+        try:
+            # O nome começa com a data/hora, então a ordem alfabética é a cronológica
+            dumps = sorted(name for name in os.listdir(self.dump_dir)
+                           if name.startswith("flight_") and name.endswith(".json"))
+            for name in dumps[:-self.max_files]:
+                os.remove(os.path.join(self.dump_dir, name))
+        except OSError as e:
+            print(f"Erro ao apagar dumps antigos do flight recorder: {e}")
+
+    def install_signal_handler(self, signum=signal.SIGUSR1):
+        """Permite pedir um dump de fora: kill -USR1 <pid>."""
+        signal.signal(signum, lambda *_: self.dump("signal"))
+
+    def overhead_ratio(self, cost_ns):
+        """Fração estimada do tempo total gasta pelo próprio recorder."""
+        elapsed = time.perf_counter_ns() - self.created_ns
+        return (self.count * cost_ns) / elapsed if elapsed > 0 else 0.0
+
+
+def measure_record_cost(samples=100000):
+    """Custo médio em ns de uma chamada a record(), medido em um recorder descartável."""
+    recorder = FlightRecorder(capacity=1024)
+    t = recorder.now()
+    start = time.perf_counter_ns()
+    for _ in range(samples):
+        t = recorder.record(PHASE_INPUT, t)
+    return (time.perf_counter_ns() - start) / samples
+
+
+# --- Ferramenta de resumo ---
+
+def summarize(paths):
+    """Agrupa as durações de todos os dumps por fase.
+
+    Dumps próximos (TIMEOUTs seguidos) têm janelas sobrepostas; cada entrada é contada uma
+    vez só, identificada pelo início absoluto (base_ns + start_us). Dumps antigos, sem
+    base_ns, não podem ser cruzados e entram inteiros.
+    """
+    durations = {name: [] for name in PHASE_NAMES}
+    seen = set()
+    for path in paths:
+        with open(path) as f:
+            data = json.load(f)
+        base_ns = data.get("base_ns")
+        for entry in data["entries"]:
+            if base_ns is not None:
+                key = (entry["phase"], base_ns + round(entry["start_us"] * 1000))
+                if key in seen:
+                    continue
+                seen.add(key)
+            durations.setdefault(entry["phase"], []).append(entry["duration_us"])
+
+    total = sum(sum(values) for values in durations.values())
+    summary = {}
+    for name, values in durations.items():
+        if not values:
+            continue
+        d = stats.distribution(values)
+        summary[name] = {
+            "count": d["count"],
+            "total_ms": sum(values) / 1000,
+            "share": sum(values) / total if total else 0.0,
+            "p50_us": d["p50"],
+            "p99_us": d["p99"],
+            "max_us": d["max"],
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'fase':<14} {'n':>7} {'total ms':>10} {'%':>6} {'p50 us':>10} {'p99 us':>10} {'max us':>12}")
+    for name, s in summary.items():
+        print(f"{name:<14} {s['count']:>7} {s['total_ms']:>10.1f} {s['share'] * 100:>6.1f} "
+              f"{s['p50_us']:>10.1f} {s['p99_us']:>10.1f} {s['max_us']:>12.1f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python3 flight_recorder.py <dump.json> [<dump.json> ...]")
+        sys.exit(1)
+    print_summary(summarize(sys.argv[1:]))
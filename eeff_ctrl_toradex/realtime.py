@@ -0,0 +1,181 @@
+import ctypes
+import ctypes.util
+import gc
+import os
+import sys
+import time
+from collections import deque
+
+import stats
+
+# --- Modo tempo real (opcional) para o loop de controle ---
+# Ativado pela variável de ambiente EEFF_REALTIME=1 (veja docker-compose.yml).
+# Cada etapa é tentada de forma independente: se o contêiner não tiver permissão
+# (CAP_SYS_NICE, CAP_IPC_LOCK) a etapa é pulada e o loop segue no modo normal.
+
+DEFAULT_RT_PRIORITY = 50           # Prioridade SCHED_FIFO (1-99)
+DEFAULT_GC_IDLE_INTERVAL_SECONDS = 1.0  # Intervalo mínimo entre coletas do GC em janelas ociosas
+DEFAULT_GC_FULL_EVERY = 10         # A cada N coletas ociosas, uma coleta completa (geração 2)
+DEFAULT_GC_MAX_BUSY_SECONDS = 30.0 # Sem janela ociosa por esse tempo, coleta mesmo assim
+JITTER_SAMPLES = 4096              # Tamanho do histórico de atrasos de wake-up
+
+# Constantes de sys/mman.h
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+
+def config_from_env():
+    """Lê a configuração do modo tempo real das variáveis de ambiente."""
+    cpu = os.environ.get("EEFF_RT_CPU")
+    return {
+        "enabled": os.environ.get("EEFF_REALTIME", "0") == "1",
+        "cpu": int(cpu) if cpu else None,
+        "priority": int(os.environ.get("EEFF_RT_PRIORITY", DEFAULT_RT_PRIORITY)),
+        "gc_idle_interval": float(os.environ.get("EEFF_GC_IDLE_INTERVAL", DEFAULT_GC_IDLE_INTERVAL_SECONDS)),
+        "gc_full_every": int(os.environ.get("EEFF_GC_FULL_EVERY", DEFAULT_GC_FULL_EVERY)),
+        "gc_max_busy": float(os.environ.get("EEFF_GC_MAX_BUSY", DEFAULT_GC_MAX_BUSY_SECONDS)),
+    }
+
+
+def set_cpu_affinity(cpu=None):
+    """Fixa a thread atual em uma CPU. Sem cpu, usa a última CPU disponível."""
+    try:
+        allowed = sorted(os.sched_getaffinity(0))
+        if cpu is None:
+            cpu = allowed[-1]
+        os.sched_setaffinity(0, {cpu})
+        return cpu
+    except (AttributeError, OSError, ValueError) as e:
+        print(f"Aviso: não foi possível fixar a CPU ({e}).")
+        return None
+
+
+def set_fifo_priority(priority=DEFAULT_RT_PRIORITY):
+    """Solicita SCHED_FIFO para a thread atual. Retorna True se conseguiu."""
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+        return True
+    except (AttributeError, OSError) as e:
+        print(f"Aviso: SCHED_FIFO indisponível ({e}). Mantendo escalonador padrão.")
+        return False
+
+
+def lock_memory():
+    """Trava as páginas do processo na RAM com mlockall. Retorna True se conseguiu."""
+    libc_name = ctypes.util.find_library("c")
+    if libc_name is None:
+        print("Aviso: libc não encontrada, mlockall ignorado.")
+        return False
+    libc = ctypes.CDLL(libc_name, use_errno=True)
+    if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+        errno = ctypes.get_errno()
+        print(f"Aviso: mlockall falhou ({os.strerror(errno)}).")
+        return False
+    return True
+
+
+def freeze_gc():
+    """Coleta uma vez, congela os objetos da inicialização e desliga o GC automático.
+
+    A partir daqui as coletas só acontecem via IdleCollector, fora dos momentos críticos.
+    """
+    gc.collect()
+    gc.freeze()
+    gc.disable()
+
+
+def enable_realtime(cpu=None, priority=DEFAULT_RT_PRIORITY):
+    """Aplica todas as etapas do modo tempo real e devolve o que foi efetivamente aplicado."""
+    applied = {
+        "cpu": set_cpu_affinity(cpu),
+        "sched_fifo": set_fifo_priority(priority),
+        "mlockall": lock_memory(),
+    }
+    freeze_gc()
+    applied["gc_frozen"] = True
+    return applied
+
+
+class WakeupJitter:
+    """Mede o atraso de wake-up de cada sleep do loop (real - pedido)."""
+
+    def __init__(self, maxlen=JITTER_SAMPLES, sleep_fn=time.sleep):
+        self.late_ns = deque(maxlen=maxlen)
+        self.sleep_fn = sleep_fn
+
+    def sleep(self, seconds):
+        start = time.perf_counter_ns()
+        self.sleep_fn(seconds)
+        self.late_ns.append(time.perf_counter_ns() - start - int(seconds * 1e9))
+
+    def summary(self):
+        d = stats.distribution(self.late_ns)
+        return {
+            "samples": d["count"],
+            "p50_us": d["p50"] / 1000,
+            "p99_us": d["p99"] / 1000,
+            "max_us": d["max"] / 1000,
+        }
+
+
+def measure_wakeup_jitter(period_seconds=0.001, samples=500):
+    """Roda uma rajada de sleeps curtos e devolve o resumo do atraso de wake-up."""
+    meter = WakeupJitter(maxlen=samples)
+    for _ in range(samples):
+        meter.sleep(period_seconds)
+    return meter.summary()
+
+
+class IdleCollector:
+    """Roda o GC manualmente, de preferência em janelas ociosas do loop.
+
+    Coletas ociosas são das gerações 0 e 1 (rápidas, já que a inicialização foi
+    congelada); a cada full_every coletas uma é completa, para que lixo cíclico
+    promovido à geração 2 não fique para sempre. Se o loop passar max_busy_seconds
+    sem nenhuma janela ociosa (atuador travado reenviando, Pi transmitindo sem parar),
+    a coleta completa é feita mesmo assim.
+    """
+
+    def __init__(self, interval_seconds=DEFAULT_GC_IDLE_INTERVAL_SECONDS,
+                 full_every=DEFAULT_GC_FULL_EVERY, max_busy_seconds=DEFAULT_GC_MAX_BUSY_SECONDS):
+        self.interval_seconds = interval_seconds
+        self.full_every = max(1, full_every)
+        self.max_busy_seconds = max_busy_seconds
+        self.last_collect = time.monotonic()
+        self.collections = 0
+        self.forced = 0
+
+    def maybe_collect(self, idle):
+        """Coleta se for a hora. Retorna a geração coletada ou None."""
+        if gc.isenabled():
+            return None
+        now = time.monotonic()
+        elapsed = now - self.last_collect
+        if idle and elapsed >= self.interval_seconds:
+            self.collections += 1
+            generation = 2 if self.collections % self.full_every == 0 else 1
+        elif not idle and elapsed >= self.max_busy_seconds:
+            self.forced += 1
+            generation = 2
+        else:
+            return None
+        gc.collect(generation)
+        self.last_collect = now
+        return generation
+
+
+def format_jitter(summary):
+    return (f"p50={summary['p50_us']:.1f} us p99={summary['p99_us']:.1f} us "
+            f"max={summary['max_us']:.1f} us ({summary['samples']} amostras)")
+
+
+if __name__ == "__main__":
+    # Execução avulsa para comparar o jitter antes/depois em qualquer host Linux.
+    config = config_from_env()
+    before = measure_wakeup_jitter()
+    print(f"Jitter de wake-up (normal):     {format_jitter(before)}")
+    applied = enable_realtime(config["cpu"], config["priority"])
+    print(f"Modo tempo real aplicado: {applied}")
+    after = measure_wakeup_jitter()
+    print(f"Jitter de wake-up (tempo real): {format_jitter(after)}")
+    sys.exit(0)
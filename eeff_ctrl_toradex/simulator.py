@@ -0,0 +1,542 @@
+import argparse
+import enum
+import io
+import json
+import os
+import random
+import runpy
+import sys
+import tempfile
+import threading
+import time
+import types
+from collections import deque
+
+import clock
+import stats
+import status_page
+
+# --- Simulador em tempo virtual do controlador do efetuador ---
+# Roda o próprio eeff_ctrl_toradex.py com UART, GPIO e teclado simulados e um relógio
+# virtual: os sleeps do loop (50 ms), a espera do reenvio (1 s) e o timeout da UART só
+# avançam o tempo simulado. Um turno inteiro de ciclos roda em segundos.
+#
+# CLI:    python3 simulator.py --hours 8 --actuator cilindro=normal:0.8:0.2,fail=0.01
+# Testes: stats = simulator.run_simulation(cycles=100, seed=1)  (veja test_simulator.py)
+
+CONTROLLER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eeff_ctrl_toradex.py")
+
+# Mesmo mapeamento tecla -> offset de eeff_ctrl_toradex.py
+GPIO_LINE_OFFSETS = {1: 0, 2: 1, 3: 5, 4: 6}
+OFFSET_TO_KEY = {offset: key for key, offset in GPIO_LINE_OFFSETS.items()}
+KEY_TO_NAME = {n + 1: name for n, name in enumerate(status_page.COMPONENT_NAMES)}
+FEEDBACK_KEYS = (2, 3, 4)  # Componentes com sensor e timeout
+
+DEFAULT_CYCLE = ["2", "3", "3", "2"]  # Vácuo inferior liga, cilindro avança/retorna, vácuo desliga
+DEFAULT_STEP_DWELL_SECONDS = 0.5      # Pausa do operador entre os passos de um ciclo
+DEFAULT_STEP_TIMEOUT_SECONDS = 30.0   # Desiste do ciclo se um passo não confirmar nesse tempo
+DEFAULT_FEEDBACK_PERIOD_SECONDS = 0.2 # Intervalo de envio do byte de status pelo Raspberry Pi
+UART_TIMEOUT_SECONDS = 0.1            # Mesmo timeout do serial.Serial do controlador
+DEFAULT_DELAYS = {
+    "vac_inferior": "normal:0.4:0.1",
+    "cilindro": "normal:0.8:0.2",
+    "vac_superior": "normal:0.4:0.1",
+}
+
+
+def parse_delay(spec):
+    """'normal:media:desvio', 'uniform:min:max', 'lognormal:mu:sigma' ou 'fixed:valor'."""
+    kind, *params = spec.split(":")
+    params = [float(p) for p in params]
+    if kind == "fixed" and len(params) == 1:
+        return lambda rng: params[0]
+    if kind == "normal" and len(params) == 2:
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+    if kind == "uniform" and len(params) == 2:
+        return lambda rng: rng.uniform(params[0], params[1])
+    if kind == "lognormal" and len(params) == 2:
+        return lambda rng: rng.lognormvariate(params[0], params[1])
+    raise ValueError(f"Distribuição de atraso inválida: {spec}")
+
+
+class ActuatorModel:
+    """Atuador com sensor: responde ao comando após um atraso aleatório.
+
+    failure_probability: chance de uma tentativa (comando ou reenvio) não responder.
+    stuck: None, "low" (sensor sempre 0) ou "high" (sensor sempre 1).
+    """
+
+    def __init__(self, name, delay="fixed:0.5", failure_probability=0.0, stuck=None, release_delay=0.05):
+        if stuck not in (None, "low", "high"):
+            raise ValueError(f"stuck deve ser 'low' ou 'high', não {stuck!r}.")
+        self.name = name
+        self.delay_spec = delay
+        self.delay = parse_delay(delay)
+        self.failure_probability = failure_probability
+        self.stuck = stuck
+        self.release_delay = release_delay
+        self.output = 0
+        self.sensor_target = 0
+        self.sensor_change_at = None
+        self.sensor_value = 0
+
+    def command(self, value, now, rng):
+        self.output = value
+        if value:
+            if rng.random() < self.failure_probability:
+                self.sensor_change_at = None # Esta tentativa não responde
+                return
+            self.sensor_target = 1
+            self.sensor_change_at = now + self.delay(rng)
+        else:
+            self.sensor_target = 0
+            self.sensor_change_at = now + self.release_delay
+
+    def sensor(self, now):
+        if self.sensor_change_at is not None and now >= self.sensor_change_at:
+            self.sensor_value = self.sensor_target
+            self.sensor_change_at = None
+        if self.stuck == "low":
+            return 0
+        if self.stuck == "high":
+            return 1
+        return self.sensor_value
+
+
+class ToolChangerModel:
+    """Tool changer não tem timeout: o feedback acompanha a saída."""
+
+    def __init__(self):
+        self.output = 0
+
+    def command(self, value, now, rng):
+        self.output = value
+
+    def sensor(self, now):
+        return self.output
+
+
+def parse_actuator(spec):
+    """'cilindro=normal:0.8:0.2,fail=0.01,stuck=low' -> (nome, kwargs do ActuatorModel)."""
+    name, _, options = spec.partition("=")
+    if name not in DEFAULT_DELAYS:
+        raise argparse.ArgumentTypeError(f"Atuador desconhecido: {name} (use {', '.join(DEFAULT_DELAYS)}).")
+    kwargs = {}
+    for option in options.split(","):
+        if not option:
+            continue
+        if option.startswith("fail="):
+            kwargs["failure_probability"] = float(option[5:])
+        elif option.startswith("stuck="):
+            kwargs["stuck"] = option[6:]
+        else:
+            parse_delay(option) # Valida já na linha de comando
+            kwargs["delay"] = option
+    return name, kwargs
+
+
+class Simulation:
+    """Mundo simulado: relógio virtual, atuadores, UART, GPIO e o operador que executa os ciclos."""
+
+    def __init__(self, cycles=None, duration_seconds=None, actuators=None, seed=None,
+                 cycle_keys=DEFAULT_CYCLE, step_dwell=DEFAULT_STEP_DWELL_SECONDS,
+                 step_timeout=DEFAULT_STEP_TIMEOUT_SECONDS, feedback_period=DEFAULT_FEEDBACK_PERIOD_SECONDS):
+        if cycles is None and duration_seconds is None:
+            raise ValueError("Informe cycles e/ou duration_seconds.")
+        self.max_cycles = cycles
+        self.duration_seconds = duration_seconds
+        self.rng = random.Random(seed)
+        self.cycle_keys = list(cycle_keys)
+        self.step_dwell = step_dwell
+        self.step_timeout = step_timeout
+        self.feedback_period = feedback_period
+
+        actuators = actuators or {}
+        self.models = {1: ToolChangerModel()}
+        for key in FEEDBACK_KEYS:
+            name = KEY_TO_NAME[key]
+            kwargs = {"delay": DEFAULT_DELAYS[name], **actuators.get(name, {})}
+            self.models[key] = ActuatorModel(name, **kwargs)
+
+        self.start = 1_700_000_000.0 # Epoch virtual fixo: execuções reprodutíveis
+        self.now = self.start
+        self.rx_queue = deque()
+        self.next_feedback_at = self.start
+        self.last_feedback = None
+        self.key_read_fd, self.key_write_fd = os.pipe()
+        self.reader = None
+        self.quit_sent = False
+
+        # Operador
+        self.cycle = 0
+        self.step = 0
+        self.cycle_started_at = None
+        self.step_pressed_at = None
+        self.step_updates = None
+        self.waiting_confirm = None
+        self.next_action_at = self.start
+        self.cleanup_keys = []
+
+        # Estatísticas
+        self.cycle_times = []
+        self.response_times = {KEY_TO_NAME[key]: [] for key in FEEDBACK_KEYS}
+        self.completed_cycles = 0
+        self.failed_cycles = 0
+        self.timeouts = {KEY_TO_NAME[key]: 0 for key in FEEDBACK_KEYS}
+        self.retries = {KEY_TO_NAME[key]: 0 for key in FEEDBACK_KEYS}
+        self.loop_iterations = 0
+
+    # --- Relógio virtual ---
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds <= UART_TIMEOUT_SECONDS:
+            self.loop_iterations += 1 # Só o sleep do fim do loop é tão curto
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        self.now += seconds
+        self.tick()
+
+    # --- Hardware simulado ---
+
+    def feedback_byte(self):
+        bits = [self.models[key].sensor(self.now) for key in (1, 2, 3, 4)]
+        return (bits[0] << 3) | (bits[1] << 2) | (bits[2] << 1) | bits[3]
+
+    def set_gpio(self, offset, value):
+        key = OFFSET_TO_KEY.get(offset)
+        if key is not None:
+            self.models[key].command(1 if value.value else 0, self.now, self.rng)
+
+    def uart_read(self, size):
+        if not self.rx_queue:
+            # Bloqueia até o próximo byte do Raspberry Pi ou até o timeout da UART
+            wait = min(UART_TIMEOUT_SECONDS, max(0.0, self.next_feedback_at - self.now))
+            self.advance(wait)
+        if self.rx_queue:
+            return bytes([self.rx_queue.popleft()])
+        return b""
+
+    def tick(self):
+        """Atualiza sensores, gera bytes de feedback e age como operador."""
+        byte = self.feedback_byte()
+        if self.now >= self.next_feedback_at or byte != self.last_feedback:
+            self.rx_queue.append(byte)
+            self.last_feedback = byte
+            self.next_feedback_at = self.now + self.feedback_period
+        if self.reader is not None and not self.quit_sent:
+            self.operate()
+
+    def press(self, key):
+        os.write(self.key_write_fd, key.encode())
+
+    # --- Operador ---
+
+    def done(self):
+        if self.max_cycles is not None and self.cycle >= self.max_cycles:
+            return True
+        return self.duration_seconds is not None and self.now - self.start >= self.duration_seconds
+
+    def operate(self):
+        if self.now < self.next_action_at:
+            return
+        snapshot = self.reader.read()
+
+        if self.waiting_confirm is not None:
+            name = KEY_TO_NAME[self.waiting_confirm]
+            if (snapshot["updates"] > self.step_updates and snapshot["outputs"][name]
+                    and not snapshot["pending"][name]):
+                self.response_times[name].append(self.now - self.step_pressed_at)
+                self.waiting_confirm = None
+                self.step += 1
+                self.next_action_at = self.now + self.step_dwell
+            elif self.now - self.step_pressed_at >= self.step_timeout and snapshot["outputs"][name]:
+                # (só com a saída ligada: durante a espera do reenvio ela fica desligada por 1 s)
+                # Passo travado: desliga o que estiver ligado e começa outro ciclo
+                self.failed_cycles += 1
+                self.waiting_confirm = None
+                self.cleanup_keys = [str(key) for key in (4, 3, 2, 1)
+                                     if snapshot["outputs"][KEY_TO_NAME[key]]]
+                self.finish_cycle(completed=False)
+            return
+
+        if self.cleanup_keys:
+            self.press(self.cleanup_keys.pop(0))
+            self.next_action_at = self.now + self.step_dwell
+            return
+
+        if self.step == len(self.cycle_keys):
+            self.finish_cycle(completed=True)
+            return
+
+        if self.step == 0:
+            if self.done():
+                self.press("q")
+                self.quit_sent = True
+                return
+            self.cycle_started_at = self.now
+
+        key = int(self.cycle_keys[self.step])
+        self.press(str(key))
+        self.step_pressed_at = self.now
+        self.step_updates = snapshot["updates"]
+        if key in FEEDBACK_KEYS and not snapshot["outputs"][KEY_TO_NAME[key]]:
+            self.waiting_confirm = key # Ligar: espera o sensor confirmar
+        else:
+            self.step += 1
+            self.next_action_at = self.now + self.step_dwell
+
+    def finish_cycle(self, completed):
+        if completed:
+            self.completed_cycles += 1
+            self.cycle_times.append(self.now - self.cycle_started_at)
+        self.cycle += 1
+        self.step = 0
+        self.next_action_at = self.now + self.step_dwell
+
+    # --- Saída do controlador ---
+
+    def parse_output(self, line):
+        """Conta TIMEOUTs e reenvios a partir das mensagens do próprio controlador."""
+        if "TIMEOUT:" in line:
+            for key, label in ((2, "Vácuo Inferior"), (3, "Cilindro"), (4, "Vácuo Superior")):
+                if f"TIMEOUT: {label} " in line:
+                    self.timeouts[KEY_TO_NAME[key]] += 1
+        elif "Reenviando comando para" in line:
+            for key, label in ((2, "Vácuo Inferior"), (3, "Cilindro"), (4, "Vácuo Superior")):
+                if line.rstrip().endswith(f"{label}."):
+                    self.retries[KEY_TO_NAME[key]] += 1
+
+    def stats(self, wall_seconds):
+        virtual_seconds = self.now - self.start
+        return {
+            "cycles": self.cycle,
+            "completed_cycles": self.completed_cycles,
+            "failed_cycles": self.failed_cycles,
+            "virtual_seconds": virtual_seconds,
+            "wall_seconds": wall_seconds,
+            "speedup": virtual_seconds / wall_seconds if wall_seconds else 0.0,
+            "loop_iterations": self.loop_iterations,
+            "cycle_time_s": stats.distribution(self.cycle_times),
+            "response_time_s": {name: stats.distribution(values) for name, values in self.response_times.items()},
+            "timeouts": dict(self.timeouts),
+            "retries": dict(self.retries),
+            "actuators": {
+                model.name: {"delay": model.delay_spec, "failure_probability": model.failure_probability,
+                             "stuck": model.stuck}
+                for key, model in self.models.items() if key in FEEDBACK_KEYS
+            },
+        }
+
+
+class SimKeyboard:
+    """stdin simulado: select() usa o fd do pipe e read(1) não tem buffer interno."""
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    def fileno(self):
+        return self.fd
+
+    def read(self, size=-1):
+        return os.read(self.fd, 1 if size < 0 else size).decode()
+
+
+class OutputSink(io.TextIOBase):
+    """Recebe o stdout do controlador: alimenta as estatísticas e guarda só o final."""
+
+    def __init__(self, sim, keep_lines=50):
+        self.sim = sim
+        self.tail = deque(maxlen=keep_lines)
+        self.partial = ""
+
+    def write(self, text):
+        lines = (self.partial + text).split("\n")
+        self.partial = lines.pop()
+        for line in lines:
+            self.sim.parse_output(line)
+            self.tail.append(line)
+        return len(text)
+
+
+def fake_serial_module(sim):
+    module = types.ModuleType("serial")
+
+    class SerialException(Exception):
+        pass
+
+    class Serial:
+        is_open = True
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def read(self, size=1):
+            return sim.uart_read(size)
+
+        def close(self):
+            self.is_open = False
+
+    module.SerialException = SerialException
+    module.Serial = Serial
+    return module
+
+
+def fake_gpiod_module(sim):
+    module = types.ModuleType("gpiod")
+
+    class Value(enum.Enum):
+        INACTIVE = 0
+        ACTIVE = 1
+
+    class Direction(enum.Enum):
+        INPUT = 1
+        OUTPUT = 2
+
+    class LineSettings:
+        def __init__(self, **kwargs):
+            pass
+
+    class Chip:
+        def __init__(self, path):
+            pass
+
+        def close(self):
+            pass
+
+    class LineRequest:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def set_value(self, offset, value):
+            sim.set_gpio(offset, value)
+
+    module.line = types.SimpleNamespace(Value=Value, Direction=Direction)
+    module.LineSettings = LineSettings
+    module.Chip = Chip
+    module.request_lines = lambda *args, **kwargs: LineRequest()
+    return module
+
+
+def run_simulation(**kwargs):
+    """Roda o controlador real contra o mundo simulado e devolve as estatísticas.
+
+    Aceita os mesmos argumentos de Simulation (cycles, duration_seconds, actuators, seed, ...).
+    Precisa rodar na thread principal: o controlador instala o handler de SIGUSR1 do flight
+    recorder, e signal.signal() fora dela levanta ValueError.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        raise RuntimeError("run_simulation precisa rodar na thread principal (o controlador instala handlers de sinal).")
+    sim = Simulation(**kwargs)
+    sink = OutputSink(sim)
+    saved_modules = {name: sys.modules.get(name) for name in ("serial", "gpiod")}
+    saved_stdin, saved_stdout = sys.stdin, sys.stdout
+    saved_env = {name: os.environ.get(name) for name in
+                 ("EEFF_STATUS_PAGE", "EEFF_FLIGHT_DIR", "EEFF_REALTIME", "EEFF_ANALOG_VACUUM")}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        page_path = os.path.join(tmp, "eeff_status")
+        os.environ.update({
+            "EEFF_STATUS_PAGE": page_path,
+            "EEFF_FLIGHT_DIR": "",      # Sem dumps: gravação síncrona a cada TIMEOUT só atrasaria a simulação
+            "EEFF_REALTIME": "0",
+            "EEFF_ANALOG_VACUUM": "0",
+        })
+        sys.modules["serial"] = fake_serial_module(sim)
+        sys.modules["gpiod"] = fake_gpiod_module(sim)
+        clock.install(sim.time, sim.sleep)
+
+        # O status inicial é publicado antes do primeiro sleep; o leitor é aberto no primeiro tick
+        original_tick = sim.tick
+
+        def tick_with_reader():
+            if sim.reader is None and os.path.exists(page_path):
+                sim.reader = status_page.StatusPageReader(page_path)
+            original_tick()
+
+        sim.tick = tick_with_reader
+        sys.stdin = SimKeyboard(sim.key_read_fd)
+        sys.stdout = sink
+        wall_start = time.perf_counter()
+        try:
+            runpy.run_path(CONTROLLER_SCRIPT, run_name="__main__")
+        finally:
+            wall_seconds = time.perf_counter() - wall_start
+            sys.stdin, sys.stdout = saved_stdin, saved_stdout
+            clock.reset()
+            for name, module in saved_modules.items():
+                if module is None:
+                    sys.modules.pop(name, None)
+                else:
+                    sys.modules[name] = module
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+            if sim.reader is not None:
+                sim.reader.close()
+            os.close(sim.key_read_fd)
+            os.close(sim.key_write_fd)
+
+    if not sim.quit_sent:
+        raise RuntimeError("O controlador encerrou antes do fim da simulação:\n" + "\n".join(sink.tail))
+    return sim.stats(wall_seconds)
+
+
+def print_stats(stats):
+    print(f"{stats['cycles']} ciclos ({stats['completed_cycles']} completos, {stats['failed_cycles']} com falha) "
+          f"em {stats['virtual_seconds'] / 3600:.2f} h virtuais / {stats['wall_seconds']:.1f} s reais "
+          f"({stats['speedup']:.0f}x)")
+    c = stats["cycle_time_s"]
+    print(f"Tempo de ciclo: média {c['mean']:.2f} s, p50 {c['p50']:.2f} s, p99 {c['p99']:.2f} s, máx {c['max']:.2f} s")
+    for name, r in stats["response_time_s"].items():
+        print(f"{name:<13} resposta p50 {r['p50']:.2f} s p99 {r['p99']:.2f} s máx {r['max']:.2f} s | "
+              f"{stats['timeouts'][name]} timeouts, {stats['retries'][name]} reenvios")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulador em tempo virtual do controlador do efetuador.")
+    parser.add_argument("--cycles", type=int, help="Número de ciclos a executar")
+    parser.add_argument("--hours", type=float, help="Duração virtual em horas (ex: 8 para um turno)")
+    parser.add_argument("--actuator", dest="actuators", type=parse_actuator, action="append", default=[],
+                        help="Modelo do atuador: nome=dist:p1:p2[,fail=prob][,stuck=low|high] (pode repetir)")
+    parser.add_argument("--cycle-keys", default="".join(DEFAULT_CYCLE), help="Teclas de um ciclo (padrão: 2332)")
+    parser.add_argument("--dwell", type=float, default=DEFAULT_STEP_DWELL_SECONDS, help="Pausa entre passos (s)")
+    parser.add_argument("--step-timeout", type=float, default=DEFAULT_STEP_TIMEOUT_SECONDS,
+                        help="Tempo máximo de um passo antes de abortar o ciclo (s)")
+    parser.add_argument("--seed", type=int, help="Semente para resultados reprodutíveis")
+    parser.add_argument("--output", help="Arquivo JSON com as estatísticas")
+    args = parser.parse_args(argv)
+    if args.cycles is None and args.hours is None:
+        args.hours = 8.0
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run_simulation(
+        cycles=args.cycles,
+        duration_seconds=args.hours * 3600 if args.hours is not None else None,
+        actuators=dict(args.actuators),
+        seed=args.seed,
+        cycle_keys=list(args.cycle_keys),
+        step_dwell=args.dwell,
+        step_timeout=args.step_timeout,
+    )
+    print_stats(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Estatísticas salvas em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+import math
+
+# --- Estatísticas de distribuição compartilhadas pelas ferramentas do controlador ---
+# Um único percentil para que p50/p99 signifiquem o mesmo em realtime.py,
+# flight_recorder.py e simulator.py (e no gpio_benchmark.py, que usa a mesma regra).
+
+
+def percentile(sorted_values, pct):
+    """Percentil nearest-rank (índice ceil(n * pct / 100) - 1) sobre uma lista já ordenada.
+
+    Ex.: com 100 valores o p99 é o 99º, não o máximo.
+    """
+    if not sorted_values:
+        return 0
+    rank = math.ceil(len(sorted_values) * pct / 100)
+    return sorted_values[min(len(sorted_values) - 1, max(0, rank - 1))]
+
+
+def distribution(values):
+    """Resumo de uma amostra: count, mean, p50, p99 e max (na unidade dos valores)."""
+    values = sorted(values)
+    if not values:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p99": percentile(values, 99),
+        "max": values[-1],
+    }
@@ -0,0 +1,242 @@
+import errno
+import mmap
+import os
+import select
+import stat
+import struct
+import sys
+import time
+import zlib
+
+# --- Página de status em memória compartilhada ---
+# O controlador publica o estado em um arquivo de layout fixo em /dev/shm, mapeado em
+# memória. Outros contêineres (HMI, supervisor) mapeiam o mesmo arquivo e leem snapshots
+# consistentes sem falar com o processo de controle.
+#
+# Consistência sem lock (seqlock): o escritor incrementa 'seq' para um valor ímpar antes
+# de escrever e para um valor par depois. O leitor copia o payload e só aceita a cópia se
+# 'seq' era par e não mudou durante a leitura.
+#
+# Ordem de memória: em Python não há como emitir uma barreira entre as escritas de 'seq'
+# e do payload (são memcpy comuns). No x86 (TSO) a ordem das escritas é preservada, mas
+# no aarch64 do Verdin outro núcleo pode ver 'seq' par com parte do payload antigo. Por
+# isso o escritor grava junto com o payload, na mesma cópia, o CRC32 dele; o leitor só
+# aceita o snapshot se, além do seqlock, o CRC bater. Um snapshot rasgado por reordenação
+# é descartado e relido como qualquer colisão com o escritor.
+#
+# Notificação: a cada atualização o escritor coloca 1 byte em um FIFO ao lado da página.
+# Um FIFO (e não eventfd) porque atravessa contêineres apenas compartilhando /dev/shm.
+# Cada byte é entregue a um único leitor, então com vários leitores o FIFO é só uma dica
+# para acordar cedo: wait() decide pelo 'seq' da página e, sem aviso, confere a página a
+# cada WAIT_POLL_SECONDS. O estado vem sempre da página.
+#
+# Uso no outro contêiner (montando /dev/shm do host):
+#   reader = StatusPageReader()
+#   snapshot = reader.read()
+#   reader.wait(timeout=1.0)  # bloqueia até a próxima atualização
+
+DEFAULT_PATH = "/dev/shm/eeff_status"
+MAGIC = b"EEFS"
+LAYOUT_VERSION = 2
+WAIT_POLL_SECONDS = 0.05  # Latência máxima de wait() quando outro leitor consumiu o aviso
+
+NUM_COMPONENTS = 4
+STATE_TEXT_BYTES = 16
+COMPONENT_NAMES = ["tool_changer", "vac_inferior", "cilindro", "vac_superior"]
+
+# Cabeçalho: magic, versão do layout, tamanho da página, seq (seqlock), CRC32 do payload
+HEADER = struct.Struct("<4sHHQI4x")
+# Payload: instante da atualização (CLOCK_MONOTONIC e epoch), contador de atualizações,
+# textos de estado dos 4 componentes, valores das 4 linhas de saída, máscara de pendentes
+# (bit N = tecla N), último byte de feedback e instante em que chegou (monotonic, 0 = nunca).
+PAYLOAD = struct.Struct("<QQQ" + f"{STATE_TEXT_BYTES}s" * NUM_COMPONENTS + "4BBBxxxxxxQ")
+SEQ_OFFSET = 8
+CRC_OFFSET = 16
+CRC = struct.Struct("<I4x")
+PAGE_SIZE = HEADER.size + PAYLOAD.size
+
+
+def fifo_path(path):
+    return path + ".fifo"
+
+
+class StatusPageWriter:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.seq = 0
+        self.updates = 0
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, PAGE_SIZE)
+            self.map = mmap.mmap(fd, PAGE_SIZE)
+        finally:
+            os.close(fd)
+        empty = bytes(PAYLOAD.size) # Página zerada, válida até o primeiro publish()
+        self.map[:PAGE_SIZE] = HEADER.pack(MAGIC, LAYOUT_VERSION, PAGE_SIZE, self.seq, zlib.crc32(empty)) + empty
+
+        # FIFO de notificação; aberto em O_RDWR para não bloquear nem falhar sem leitores
+        fifo = fifo_path(path)
+        try:
+            os.mkfifo(fifo, 0o666)
+        except FileExistsError:
+            pass
+        self.notify_fd = os.open(fifo, os.O_RDWR | os.O_NONBLOCK)
+
+    def publish(self, states, outputs, pending_mask, feedback_byte=0, feedback_ns=0):
+        """Escreve um novo snapshot. states: 4 textos; outputs: 4 valores 0/1."""
+        self.updates += 1
+        payload = PAYLOAD.pack(
+            time.monotonic_ns(),
+            time.time_ns(),
+            self.updates,
+            *[state.encode("utf-8")[:STATE_TEXT_BYTES] for state in states],
+            *outputs,
+            pending_mask,
+            feedback_byte,
+            feedback_ns,
+        )
+        self.seq += 1 # Ímpar: escrita em andamento
+        struct.pack_into("<Q", self.map, SEQ_OFFSET, self.seq)
+        self.map[CRC_OFFSET:PAGE_SIZE] = CRC.pack(zlib.crc32(payload)) + payload
+        self.seq += 1 # Par: snapshot consistente
+        struct.pack_into("<Q", self.map, SEQ_OFFSET, self.seq)
+
+        try:
+            os.write(self.notify_fd, b"\x01")
+        except BlockingIOError:
+            pass # FIFO cheio: leitores já têm aviso pendente
+
+    def close(self):
+        self.map.close()
+        os.close(self.notify_fd)
+
+
+class StatusPageReader:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            self.map = mmap.mmap(fd, PAGE_SIZE, prot=mmap.PROT_READ)
+        finally:
+            os.close(fd)
+        magic, version, size, _, _ = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} não é uma página de status ({magic!r}).")
+        if version != LAYOUT_VERSION or size != PAGE_SIZE:
+            raise ValueError(f"Versão de layout {version} (tamanho {size}) incompatível com {LAYOUT_VERSION} ({PAGE_SIZE}).")
+        self.notify_fd = None
+        self.last_seq = None # Último seq entregue por read()/wait()
+
+    def sequence(self):
+        return struct.unpack_from("<Q", self.map, SEQ_OFFSET)[0]
+
+    def read(self, timeout=0.1):
+        """Devolve um snapshot consistente como dicionário."""
+        deadline = time.monotonic() + timeout
+        while True:
+            seq_before = self.sequence()
+            if not seq_before & 1: # Ímpar: escrita em andamento
+                raw = self.map[CRC_OFFSET:PAGE_SIZE]
+                if self.sequence() == seq_before:
+                    (crc,) = CRC.unpack_from(raw)
+                    payload = raw[CRC.size:]
+                    if zlib.crc32(payload) == crc: # Confere contra reordenação das escritas
+                        self.last_seq = seq_before
+                        return self._decode(payload, seq_before)
+            if time.monotonic() >= deadline:
+                break
+            os.sched_yield() # Dá a vez ao escritor
+        raise TimeoutError("Não foi possível obter um snapshot consistente da página de status.")
+
+    @staticmethod
+    def _decode(raw, seq):
+        values = PAYLOAD.unpack(raw)
+        update_ns, update_epoch_ns, updates = values[0:3]
+        states = values[3:3 + NUM_COMPONENTS]
+        outputs = values[3 + NUM_COMPONENTS:3 + 2 * NUM_COMPONENTS]
+        pending_mask, feedback_byte, feedback_ns = values[3 + 2 * NUM_COMPONENTS:]
+        return {
+            "seq": seq,
+            "updates": updates,
+            "update_monotonic_ns": update_ns,
+            "update_epoch_ns": update_epoch_ns,
+            "states": {name: state.rstrip(b"\0").decode("utf-8", "ignore")
+                       for name, state in zip(COMPONENT_NAMES, states)},
+            "outputs": {name: value for name, value in zip(COMPONENT_NAMES, outputs)},
+            "pending": {name: bool(pending_mask & (1 << (n + 1))) for n, name in enumerate(COMPONENT_NAMES)},
+            "feedback_byte": feedback_byte,
+            "feedback_monotonic_ns": feedback_ns,
+        }
+
+    def wait(self, timeout=None):
+        """Bloqueia até a página mudar desde o último read()/wait() (ou timeout).
+
+        Retorna True se houve atualização. Quem decide é o 'seq' da página; o FIFO só
+        acorda antes do próximo WAIT_POLL_SECONDS, já que outro leitor pode ter levado o aviso.
+        """
+        if self.notify_fd is None:
+            self.notify_fd = os.open(fifo_path(self.path), os.O_RDONLY | os.O_NONBLOCK)
+        if self.last_seq is None:
+            self.last_seq = self.sequence()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            seq = self.sequence()
+            if seq != self.last_seq:
+                self.last_seq = seq
+                return True
+            poll = WAIT_POLL_SECONDS
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                poll = min(poll, remaining)
+            rlist, _, _ = select.select([self.notify_fd], [], [], poll)
+            if rlist:
+                try:
+                    data = os.read(self.notify_fd, 4096) # Drena os avisos acumulados
+                except OSError as e:
+                    if e.errno != errno.EAGAIN:
+                        raise
+                    continue
+                if not data:
+                    # Sem escritor no FIFO (controlador parado): evita girar em falso
+                    time.sleep(poll)
+
+    def close(self):
+        self.map.close()
+        if self.notify_fd is not None:
+            os.close(self.notify_fd)
+
+
+def open_writer(path):
+    """Cria o escritor ou devolve None (com aviso) se /dev/shm não estiver disponível."""
+    if not path:
+        return None
+    try:
+        return StatusPageWriter(path)
+    except OSError as e:
+        print(f"Aviso: página de status em {path} indisponível ({e}).")
+        return None
+
+
+if __name__ == "__main__":
+    # Leitor simples: imprime o snapshot atual, ou cada atualização com --watch.
+    path = os.environ.get("EEFF_STATUS_PAGE", DEFAULT_PATH)
+    if not os.path.exists(path) or not stat.S_ISREG(os.stat(path).st_mode):
+        print(f"Página de status {path} não encontrada.")
+        sys.exit(1)
+    reader = StatusPageReader(path)
+    try:
+        while True:
+            start = time.perf_counter_ns()
+            snapshot = reader.read()
+            elapsed_us = (time.perf_counter_ns() - start) / 1000
+            print(f"{snapshot} (leitura em {elapsed_us:.1f} us)")
+            if "--watch" not in sys.argv:
+                break
+            reader.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
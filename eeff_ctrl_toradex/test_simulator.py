@@ -0,0 +1,55 @@
+import threading
+import unittest
+
+import simulator
+
+
+def run(cycles=20, seed=1, **actuators):
+    return simulator.run_simulation(
+        cycles=cycles, seed=seed,
+        actuators=dict(simulator.parse_actuator(f"{name}={spec}") for name, spec in actuators.items()))
+
+
+class RunSimulationTest(unittest.TestCase):
+    def test_default_models_complete_every_cycle(self):
+        stats = run()
+        self.assertEqual(stats["cycles"], 20)
+        self.assertEqual(stats["completed_cycles"], 20)
+        self.assertEqual(stats["failed_cycles"], 0)
+        self.assertEqual(sum(stats["timeouts"].values()), 0)
+        self.assertEqual(sum(stats["retries"].values()), 0)
+
+    def test_stuck_cylinder_fails_every_cycle(self):
+        stats = run(cycles=5, cilindro="fixed:0.5,stuck=low")
+        self.assertEqual(stats["completed_cycles"], 0)
+        self.assertEqual(stats["failed_cycles"], 5)
+        self.assertGreater(stats["timeouts"]["cilindro"], 0)
+        self.assertEqual(stats["timeouts"]["cilindro"], stats["retries"]["cilindro"])
+        self.assertEqual(stats["timeouts"]["vac_inferior"], 0)
+
+    def test_same_seed_same_results(self):
+        first = run(cycles=10, seed=7, cilindro="normal:0.8:0.2,fail=0.2")
+        second = run(cycles=10, seed=7, cilindro="normal:0.8:0.2,fail=0.2")
+        for stats in (first, second):
+            stats.pop("wall_seconds")
+            stats.pop("speedup")
+        self.assertEqual(first, second)
+
+    def test_requires_main_thread(self):
+        errors = []
+
+        def target():
+            try:
+                run(cycles=1)
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(errors), 1)
+        self.assertIn("thread principal", str(errors[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import time
+import unittest
+
+import vacuum_sensor
+
+SAMPLE_PERIOD_SECONDS = 0.001
+
+
+def replay(detector, values, start=0.0):
+    """Passa uma curva (lista de volts, uma amostra por ms) pelo detector. Retorna os estados."""
+    return [detector.update(start + n * SAMPLE_PERIOD_SECONDS, value) for n, value in enumerate(values)]
+
+
+def ramp(v0, v1, samples):
+    return [v0 + (v1 - v0) * n / (samples - 1) for n in range(samples)]
+
+
+def wait_until(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.002)
+    return False
+
+
+class VacuumDetectorTest(unittest.TestCase):
+    def setUp(self):
+        self.detector = vacuum_sensor.VacuumDetector(on_threshold=2.5, off_threshold=2.2, leak_rate=-5.0)
+
+    def test_confirms_after_confirm_samples_above_threshold(self):
+        states = replay(self.detector, [0.3] * 5 + [3.0] * 5)
+        self.assertEqual(states.index(True), 5 + vacuum_sensor.DEFAULT_CONFIRM_SAMPLES - 1)
+        self.assertEqual(self.detector.achieved_at, (5 + vacuum_sensor.DEFAULT_CONFIRM_SAMPLES - 1) * SAMPLE_PERIOD_SECONDS)
+
+    def test_isolated_spike_does_not_confirm(self):
+        states = replay(self.detector, [0.3, 3.0, 3.0, 0.3, 3.0, 3.0, 0.3])
+        self.assertFalse(any(states))
+
+    def test_hysteresis_between_thresholds(self):
+        replay(self.detector, [3.0] * 10)
+        self.assertTrue(self.detector.achieved)
+        # Descida lenta (abaixo da taxa de vazamento) para entre os limiares: continua com vácuo
+        replay(self.detector, ramp(3.0, 2.3, 500), start=0.01)
+        self.assertTrue(self.detector.achieved)
+        replay(self.detector, ramp(2.3, 2.1, 100), start=0.51)
+        self.assertFalse(self.detector.achieved)
+        self.assertIsNone(self.detector.achieved_at)
+        # Voltar para entre os limiares não reconfirma
+        replay(self.detector, [2.4] * 20, start=0.61)
+        self.assertFalse(self.detector.achieved)
+
+    def test_fast_leak_loses_vacuum_above_off_threshold(self):
+        replay(self.detector, [3.0] * 10)
+        states = replay(self.detector, ramp(3.0, 2.8, 20), start=0.01) # -10 V/s
+        self.assertFalse(states[-1])
+        self.assertGreater(self.detector.last_value, self.detector.off_threshold)
+
+    def test_rejects_inverted_thresholds(self):
+        with self.assertRaises(ValueError):
+            vacuum_sensor.VacuumDetector(on_threshold=2.0, off_threshold=2.2)
+
+
+class FakeADS1115BusTest(unittest.TestCase):
+    def test_reads_each_channel(self):
+        bus = vacuum_sensor.FakeADS1115Bus({0: [(0.0, 1.0)], 1: [(0.0, 3.0)]})
+        values = [vacuum_sensor.read_ads1115(bus, vacuum_sensor.ADS1115_ADDRESS, channel) for channel in (0, 1, 0, 1)]
+        for value, expected in zip(values, [1.0, 3.0, 1.0, 3.0]):
+            self.assertAlmostEqual(value, expected, places=3)
+
+    def test_early_read_returns_previous_conversion(self):
+        bus = vacuum_sensor.FakeADS1115Bus({0: [(0.0, 1.0)], 1: [(0.0, 3.0)]})
+        self.assertAlmostEqual(vacuum_sensor.read_ads1115(bus, vacuum_sensor.ADS1115_ADDRESS, 0), 1.0, places=3)
+        # Canal 1 a 128 SPS (~7.8 ms), lido após 1.5 ms: ainda vem o resultado do canal 0
+        config = 0xC383 | (1 << 12)
+        bus.write_i2c_block_data(vacuum_sensor.ADS1115_ADDRESS, vacuum_sensor.CONFIG_REG, [config >> 8, config & 0xFF])
+        time.sleep(0.0015)
+        data = bus.read_i2c_block_data(vacuum_sensor.ADS1115_ADDRESS, vacuum_sensor.CONVERSION_REG, 2)
+        self.assertAlmostEqual(((data[0] << 8) | data[1]) * vacuum_sensor.FULL_SCALE_VOLTS / 32768, 1.0, places=3)
+
+    def test_missing_device_raises_oserror(self):
+        bus = vacuum_sensor.FakeADS1115Bus({}, address=0x49)
+        with self.assertRaises(OSError):
+            vacuum_sensor.read_ads1115(bus, vacuum_sensor.ADS1115_ADDRESS, 0)
+
+
+class PressureSamplerTest(unittest.TestCase):
+    def start(self, curves):
+        config = dict(vacuum_sensor.config_from_env(), on_threshold=2.5, off_threshold=2.2, leak_rate=-5.0)
+        sampler = vacuum_sensor.start_sampler(config, bus=vacuum_sensor.FakeADS1115Bus(curves))
+        self.addCleanup(sampler.stop)
+        return sampler
+
+    def test_replayed_curves(self):
+        # A0 sobe até o vácuo; A1 sobe e depois vaza rápido
+        sampler = self.start({
+            0: [(0.0, 0.3), (0.2, 3.2)],
+            1: [(0.0, 0.3), (0.1, 3.0), (0.3, 3.0), (0.31, 0.5)],
+        })
+        self.assertTrue(wait_until(lambda: sampler.is_achieved(0) and sampler.is_achieved(1)))
+        self.assertTrue(wait_until(lambda: not sampler.is_achieved(1)))
+        self.assertTrue(sampler.is_achieved(0))
+        self.assertEqual(sampler.errors, 0)
+
+    def test_level_from_before_the_command_does_not_confirm(self):
+        level = {"volts": 3.0}
+        sampler = self.start({0: lambda t: level["volts"]})
+        self.assertTrue(wait_until(lambda: sampler.is_achieved(0)))
+
+        command_monotonic = time.monotonic()
+        time.sleep(0.05)
+        self.assertTrue(sampler.is_achieved(0))
+        self.assertFalse(sampler.achieved_since(0, command_monotonic))
+
+        # Perde o vácuo e volta a atingi-lo depois de um novo comando: agora confirma
+        level["volts"] = 0.3
+        self.assertTrue(wait_until(lambda: not sampler.is_achieved(0)))
+        command_monotonic = time.monotonic()
+        level["volts"] = 3.0
+        self.assertTrue(wait_until(lambda: sampler.achieved_since(0, command_monotonic)))
+
+    def test_backs_off_without_device(self):
+        config = vacuum_sensor.config_from_env()
+        sampler = vacuum_sensor.start_sampler(config, bus=vacuum_sensor.FakeADS1115Bus({}, address=0x49))
+        self.addCleanup(sampler.stop)
+        time.sleep(0.3)
+        # Espera crescente a partir de 10 ms: poucas tentativas, não milhares
+        self.assertLess(sampler.errors, 10)
+        self.assertGreater(sampler.backoff, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,306 @@
+import os
+import threading
+import time
+from collections import deque
+
+# smbus2 só é necessário com o ADS1115 real; o FakeADS1115Bus roda sem ele.
+try:
+    import smbus2
+except ImportError:
+    smbus2 = None
+
+# --- Confirmação analógica de vácuo via ADS1115 (opcional) ---
+# Ativada por EEFF_ANALOG_VACUUM=1. Uma thread amostra os canais do ADS1115 em alta taxa
+# e um detector por canal declara "vácuo atingido" assim que a curva cruza o limiar,
+# antes do bit digital repassado pelo Raspberry Pi mudar.
+# A tensão do sensor é tratada como proporcional ao vácuo: quanto maior, mais vácuo.
+
+I2C_BUS = "/dev/i2c-3"
+ADS1115_ADDRESS = 0x48
+CONFIG_REG = 0x01
+CONVERSION_REG = 0x00
+# Config: OS=1 (inicia), MUX=100+canal (AINx x GND), PGA=001 (±4.096 V), single-shot,
+# DR=111 (860 SPS), comparador desligado. (O 0xC183 de i2c_read.py é ±6.144 V a 128 SPS.)
+CONFIG_SINGLE_SHOT = 0xC3E3
+CONFIG_OS_BIT = 0x8000             # Na leitura: 1 = nenhuma conversão em andamento
+CONVERSION_DELAY_SECONDS = 1 / 860 # Tempo nominal de uma conversão a 860 SPS
+CONVERSION_POLL_SECONDS = 0.0002   # Intervalo entre consultas ao bit OS
+CONVERSION_TIMEOUT_SECONDS = 0.01  # Sem conversão pronta nesse tempo: trata como falha de I2C
+FULL_SCALE_VOLTS = 4.096
+
+# Canal do ADS1115 usado por cada vácuo (chave: tecla em GPIO_LINE_OFFSETS)
+VACUUM_CHANNELS = {
+    2: 0, # Vácuo Inferior -> A0
+    4: 1  # Vácuo Superior -> A1
+}
+
+DEFAULT_ON_THRESHOLD_VOLTS = 2.5   # Acima disso: vácuo atingido
+DEFAULT_OFF_THRESHOLD_VOLTS = 2.2  # Abaixo disso: vácuo perdido (histerese)
+DEFAULT_LEAK_RATE_VOLTS_PER_S = -5.0  # Queda mais rápida que isso: vácuo perdido mesmo acima do limiar
+DEFAULT_SLOPE_WINDOW = 8           # Amostras usadas para estimar a taxa de variação
+DEFAULT_CONFIRM_SAMPLES = 3        # Amostras consecutivas acima do limiar para confirmar
+ERROR_BACKOFF_MIN_SECONDS = 0.01   # Espera após a primeira falha de I2C
+ERROR_BACKOFF_MAX_SECONDS = 1.0    # Espera máxima com o ADS1115 ausente/desconectado
+
+
+def config_from_env():
+    """Lê a configuração da confirmação analógica das variáveis de ambiente."""
+    return {
+        "enabled": os.environ.get("EEFF_ANALOG_VACUUM", "0") == "1",
+        "bus": os.environ.get("EEFF_I2C_BUS", I2C_BUS),
+        "address": int(os.environ.get("EEFF_ADS1115_ADDRESS", hex(ADS1115_ADDRESS)), 0),
+        "on_threshold": float(os.environ.get("EEFF_VAC_ON_V", DEFAULT_ON_THRESHOLD_VOLTS)),
+        "off_threshold": float(os.environ.get("EEFF_VAC_OFF_V", DEFAULT_OFF_THRESHOLD_VOLTS)),
+        "leak_rate": float(os.environ.get("EEFF_VAC_LEAK_RATE", DEFAULT_LEAK_RATE_VOLTS_PER_S)),
+    }
+
+
+def wait_conversion(bus, address, timeout=CONVERSION_TIMEOUT_SECONDS):
+    """Espera o bit OS do registrador de configuração indicar a conversão concluída.
+
+    Ler antes disso devolve o resultado anterior (possivelmente de outro canal).
+    """
+    time.sleep(CONVERSION_DELAY_SECONDS)
+    deadline = time.monotonic() + timeout
+    while True:
+        data = bus.read_i2c_block_data(address, CONFIG_REG, 2)
+        if ((data[0] << 8) | data[1]) & CONFIG_OS_BIT:
+            return
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"ADS1115 {address:#04x}: conversão não concluída em {timeout * 1000:.0f} ms")
+        time.sleep(CONVERSION_POLL_SECONDS)
+
+
+def read_ads1115(bus, address, channel):
+    """Conversão single-shot de um canal (mesma sequência de i2c/i2c_read.py). Retorna volts."""
+    config = CONFIG_SINGLE_SHOT | (channel << 12)
+    bus.write_i2c_block_data(address, CONFIG_REG, [(config >> 8) & 0xFF, config & 0xFF])
+    wait_conversion(bus, address)
+    bus.write_byte(address, CONVERSION_REG)
+    data = bus.read_i2c_block_data(address, CONVERSION_REG, 2)
+    raw = (data[0] << 8) | data[1]
+    if raw & 0x8000:  # Conversão para número com sinal
+        raw -= 65536
+    return raw * FULL_SCALE_VOLTS / 32768
+
+
+class VacuumDetector:
+    """Limiar com histerese e detecção por taxa de variação para um canal de vácuo."""
+
+    def __init__(self, on_threshold=DEFAULT_ON_THRESHOLD_VOLTS, off_threshold=DEFAULT_OFF_THRESHOLD_VOLTS,
+                 leak_rate=DEFAULT_LEAK_RATE_VOLTS_PER_S, slope_window=DEFAULT_SLOPE_WINDOW,
+                 confirm_samples=DEFAULT_CONFIRM_SAMPLES):
+        if off_threshold >= on_threshold:
+            raise ValueError("off_threshold deve ser menor que on_threshold (histerese).")
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.leak_rate = leak_rate
+        self.confirm_samples = confirm_samples
+        self.samples = deque(maxlen=slope_window)
+        self.above_count = 0
+        self.achieved = False
+        self.achieved_at = None
+        self.last_value = None
+
+    def slope(self):
+        """Taxa de variação em V/s entre a amostra mais antiga e a mais nova da janela."""
+        if len(self.samples) < 2:
+            return 0.0
+        (t0, v0), (t1, v1) = self.samples[0], self.samples[-1]
+        return (v1 - v0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def update(self, timestamp, value):
+        """Processa uma amostra. Retorna o estado atual de 'vácuo atingido'."""
+        self.samples.append((timestamp, value))
+        self.last_value = value
+        rate = self.slope()
+
+        if not self.achieved:
+            # Conta amostras acima do limiar; uma subida isolada (ruído) não confirma
+            self.above_count = self.above_count + 1 if value >= self.on_threshold else 0
+            if self.above_count >= self.confirm_samples and rate > self.leak_rate:
+                self.achieved = True
+                self.achieved_at = timestamp
+        elif value < self.off_threshold or rate <= self.leak_rate:
+            self.achieved = False
+            self.achieved_at = None
+            self.above_count = 0
+
+        return self.achieved
+
+
+class PressureSampler(threading.Thread):
+    """Thread que amostra os canais de vácuo continuamente sem bloquear o loop de controle.
+
+    O loop só lê os atributos dos detectores; a atribuição de bool/float é atômica no
+    CPython, então não há lock no caminho do loop.
+    """
+
+    def __init__(self, bus, address, detectors, period_seconds=0.0):
+        super().__init__(daemon=True, name="pressure-sampler")
+        self.bus = bus
+        self.address = address
+        self.detectors = detectors  # {canal: VacuumDetector}
+        self.period_seconds = period_seconds
+        self.samples_read = 0
+        self.errors = 0
+        self.backoff = 0.0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            for channel, detector in self.detectors.items():
+                try:
+                    value = read_ads1115(self.bus, self.address, channel)
+                except OSError as e:
+                    self.errors += 1
+                    # Sem o dispositivo a leitura falha na hora: espera crescente para não
+                    # ocupar a CPU (e o GIL) do loop de controle
+                    if not self.backoff:
+                        print(f"Erro ao ler o ADS1115 (canal A{channel}): {e}. Tentando novamente com espera.")
+                        self.backoff = ERROR_BACKOFF_MIN_SECONDS
+                    else:
+                        self.backoff = min(self.backoff * 2, ERROR_BACKOFF_MAX_SECONDS)
+                    self._stop_event.wait(self.backoff)
+                    break
+                if self.backoff:
+                    print("ADS1115 respondendo novamente.")
+                    self.backoff = 0.0
+                detector.update(time.monotonic(), value)
+                self.samples_read += 1
+            if self.period_seconds:
+                self._stop_event.wait(self.period_seconds)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=1)
+
+    def is_achieved(self, channel):
+        return self.detectors[channel].achieved
+
+    def achieved_since(self, channel, command_monotonic):
+        """True só se o vácuo foi atingido por um cruzamento do limiar após o comando.
+
+        'achieved' é um nível e pode ter sobrado de antes do comando (desligar e religar
+        com a pressão ainda acima do off_threshold); por isso compara achieved_at, no
+        mesmo relógio time.monotonic() das amostras, com o instante do comando.
+        """
+        detector = self.detectors[channel]
+        achieved_at = detector.achieved_at
+        return detector.achieved and achieved_at is not None and achieved_at > command_monotonic
+
+
+def open_bus(path=I2C_BUS):
+    if smbus2 is None:
+        raise RuntimeError("Biblioteca smbus2 não encontrada. Instale-a para usar o ADS1115.")
+    return smbus2.SMBus(path)
+
+
+def start_sampler(config, bus=None):
+    """Cria os detectores de VACUUM_CHANNELS e inicia a thread de amostragem."""
+    if bus is None:
+        bus = open_bus(config["bus"])
+    detectors = {
+        channel: VacuumDetector(config["on_threshold"], config["off_threshold"], config["leak_rate"])
+        for channel in VACUUM_CHANNELS.values()
+    }
+    sampler = PressureSampler(bus, config["address"], detectors)
+    sampler.start()
+    return sampler
+
+
+# Fundo de escala (V) por PGA e amostras/s por DR, como na tabela do datasheet
+PGA_FULL_SCALE_VOLTS = [6.144, 4.096, 2.048, 1.024, 0.512, 0.256, 0.256, 0.256]
+DATA_RATES_SPS = [8, 16, 32, 64, 128, 250, 475, 860]
+
+
+class FakeADS1115Bus:
+    """Barramento I2C falso que reproduz curvas de pressão no ADS1115.
+
+    curves: {canal: função(t_segundos) -> volts} ou {canal: [(t, volts), ...]}.
+    Nas listas, o valor é interpolado linearmente e fica constante após o último ponto.
+
+    Modela a conversão single-shot: o PGA e o DR escritos definem a escala e a duração
+    (1/DR); até o fim dela o bit OS lê 0, o registrador de conversão mantém o resultado
+    anterior e um novo pedido de conversão é ignorado, como no chip.
+    """
+
+    def __init__(self, curves, address=ADS1115_ADDRESS):
+        self.curves = curves
+        self.address = address
+        self.start = time.monotonic()
+        self.config = 0x8583 # Valor de reset do registrador de configuração
+        self.result = 0
+        self.converting = None # (canal, fundo de escala, instante em que fica pronta)
+        self.conversions = 0
+        self.closed = False
+
+    def _value(self, channel, now):
+        curve = self.curves.get(channel)
+        if curve is None:
+            return 0.0
+        t = now - self.start
+        if callable(curve):
+            return curve(t)
+        if t <= curve[0][0]:
+            return curve[0][1]
+        for (t0, v0), (t1, v1) in zip(curve, curve[1:]):
+            if t0 <= t <= t1:
+                return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+        return curve[-1][1]
+
+    def _transaction(self, address):
+        if address != self.address:
+            raise OSError(121, "Remote I/O error")
+        if self.converting is not None and time.monotonic() >= self.converting[2]:
+            # Conversão concluída: o valor da curva no fim dela vai para o registrador
+            channel, full_scale, ready_at = self.converting
+            raw = int(round(self._value(channel, ready_at) * 32768 / full_scale))
+            self.result = max(-32768, min(32767, raw)) & 0xFFFF
+            self.converting = None
+
+    def write_i2c_block_data(self, address, register, data):
+        self._transaction(address)
+        if register != CONFIG_REG or self.converting is not None:
+            return
+        self.config = ((data[0] << 8) | data[1]) & ~CONFIG_OS_BIT
+        if data[0] & 0x80:
+            mux = (self.config >> 12) & 0x07
+            full_scale = PGA_FULL_SCALE_VOLTS[(self.config >> 9) & 0x07]
+            rate = DATA_RATES_SPS[(self.config >> 5) & 0x07]
+            channel = mux - 4 if mux >= 4 else None # Só entradas simples (AINx x GND)
+            self.converting = (channel, full_scale, time.monotonic() + 1 / rate)
+            self.conversions += 1
+
+    def write_byte(self, address, value):
+        self._transaction(address)
+
+    def read_i2c_block_data(self, address, register, length):
+        self._transaction(address)
+        if register == CONFIG_REG:
+            value = self.config | (0 if self.converting is not None else CONFIG_OS_BIT)
+        else:
+            value = self.result
+        return [(value >> 8) & 0xFF, value & 0xFF][:length]
+
+    def close(self):
+        self.closed = True
+
+
+if __name__ == "__main__":
+    # Demonstração com o barramento falso: A0 sobe até o vácuo, A1 sobe e vaza.
+    bus = FakeADS1115Bus({
+        0: [(0.0, 0.3), (0.4, 3.2)],
+        1: [(0.0, 0.3), (0.3, 3.0), (0.6, 3.0), (0.65, 0.5)],
+    })
+    sampler = start_sampler(config_from_env(), bus=bus)
+    start = time.monotonic()
+    last = None
+    while time.monotonic() - start < 1.0:
+        current = {channel: sampler.is_achieved(channel) for channel in sampler.detectors}
+        if current != last:
+            print(f"{time.monotonic() - start:.3f} s: {current}")
+            last = current
+        time.sleep(0.005)
+    sampler.stop()
+    print(f"{sampler.samples_read} amostras, {sampler.errors} erros")
@@ -0,0 +1,327 @@
+import argparse
+import json
+import math
+import sys
+import time
+from datetime import datetime
+
+# gpiod só é necessário para o backend real (hardware ou gpio-sim).
+# O backend "fake" roda em qualquer host, sem libgpiod instalada.
+try:
+    import gpiod
+except ImportError:
+    gpiod = None
+
+# --- Configuração GPIO Toradex (OUTPUTS) ---
+# Mesmos offsets usados em gpio_toradex.py. Para gpio-sim, passe o chip simulado com --chip.
+GPIO_CHIP = "/dev/gpiochip0"
+GPIO_LINE_OFFSETS = {
+    1: 0, # GPIO 27
+    2: 1, # GPIO 28
+    3: 5, # GPIO 29
+    4: 6  # GPIO 30
+}
+
+DEFAULT_OUTPUT_FILE = "gpio_benchmark.json"
+
+# Valores lógicos das linhas. Com gpiod usa o enum da biblioteca; sem ela, inteiros bastam para o fake.
+if gpiod is not None:
+    VALUE_ACTIVE = gpiod.line.Value.ACTIVE
+    VALUE_INACTIVE = gpiod.line.Value.INACTIVE
+else:
+    VALUE_ACTIVE = 1
+    VALUE_INACTIVE = 0
+
+
+class FakeLineRequest:
+    """Substituto de gpiod.LineRequest para rodar o benchmark sem hardware.
+
+    call_latency_ns simula o custo de cada chamada ao driver (ioctl), para que
+    a comparação set_value x set_values tenha algum significado no host.
+    """
+
+    def __init__(self, offsets, call_latency_ns=0):
+        self.values = {offset: VALUE_INACTIVE for offset in offsets}
+        self.call_latency_ns = call_latency_ns
+        self.calls = 0
+
+    def _simulate_call(self):
+        self.calls += 1
+        if self.call_latency_ns:
+            end = time.perf_counter_ns() + self.call_latency_ns
+            while time.perf_counter_ns() < end:
+                pass
+
+    def set_value(self, offset, value):
+        self._simulate_call()
+        self.values[offset] = value
+
+    def set_values(self, values):
+        self._simulate_call()
+        self.values.update(values)
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+def open_line_request(backend, chip_path, offsets, fake_latency_ns=0):
+    """Retorna um context manager com set_value/set_values para os offsets pedidos."""
+    if backend == "fake":
+        return FakeLineRequest(offsets, fake_latency_ns)
+
+    if gpiod is None:
+        raise RuntimeError("Biblioteca gpiod não encontrada. Use --backend fake ou instale python3-gpiod.")
+
+    config = {
+        tuple(offsets): gpiod.LineSettings(
+            direction=gpiod.line.Direction.OUTPUT,
+            output_value=gpiod.line.Value.INACTIVE # Inicia desligado
+        )
+    }
+    return gpiod.request_lines(chip_path, consumer="TORADEX_GPIO_BENCH", config=config)
+
+
+# --- Geração de padrões ---
+# Cada padrão é uma lista de (instante_alvo_ns, valor) relativa ao início da medição.
+# Período 0 ("o mais rápido possível", todos os instantes alvo em 0) só vale para square.
+
+def pattern_square(frequency_hz, cycles):
+    half_period_ns = int(1e9 / (2 * frequency_hz)) if frequency_hz > 0 else 0
+    edges = []
+    for i in range(2 * cycles):
+        value = VALUE_ACTIVE if i % 2 == 0 else VALUE_INACTIVE
+        edges.append((i * half_period_ns, value))
+    return edges
+
+
+def pattern_pwm(frequency_hz, duty, cycles):
+    if frequency_hz <= 0:
+        raise ValueError("PWM precisa de --frequency > 0 (sem período o duty não tem efeito).")
+    if not 0.0 < duty < 1.0:
+        raise ValueError("duty deve estar entre 0 e 1 (exclusivo).")
+    period_ns = int(1e9 / frequency_hz)
+    high_ns = int(period_ns * duty)
+    edges = []
+    for i in range(cycles):
+        start = i * period_ns
+        edges.append((start, VALUE_ACTIVE))
+        edges.append((start + high_ns, VALUE_INACTIVE))
+    return edges
+
+
+def pattern_burst(frequency_hz, pulses, bursts, gap_s):
+    if frequency_hz <= 0:
+        raise ValueError("burst precisa de --frequency > 0 (o jitter é medido contra o período do pulso).")
+    half_period_ns = int(1e9 / (2 * frequency_hz))
+    gap_ns = int(gap_s * 1e9)
+    burst_len_ns = 2 * pulses * half_period_ns
+    edges = []
+    for b in range(bursts):
+        start = b * (burst_len_ns + gap_ns)
+        for i in range(2 * pulses):
+            value = VALUE_ACTIVE if i % 2 == 0 else VALUE_INACTIVE
+            edges.append((start + i * half_period_ns, value))
+    return edges
+
+
+def build_pattern(args):
+    if args.pattern == "square":
+        return pattern_square(args.frequency, args.cycles)
+    if args.pattern == "pwm":
+        return pattern_pwm(args.frequency, args.duty, args.cycles)
+    if args.pattern == "burst":
+        return pattern_burst(args.frequency, args.pulses, args.bursts, args.gap)
+    raise ValueError(f"Padrão desconhecido: {args.pattern}")
+
+
+# --- Execução e medição ---
+
+def drive_pattern(request, offsets, edges, api):
+    """Aplica o padrão nas linhas e devolve os instantes reais (ns) de cada borda.
+
+    api == "single": uma chamada set_value por linha em cada borda.
+    api == "multi":  uma única chamada set_values com todas as linhas.
+    O instante registrado é o fim da(s) chamada(s), quando o valor já foi escrito.
+    """
+    timestamps = [0] * len(edges)
+    perf_counter_ns = time.perf_counter_ns
+    start_ns = perf_counter_ns()
+
+    for i, (target_ns, value) in enumerate(edges):
+        # Espera ativa até o instante alvo: sleep() tem granularidade de ms e mascararia o jitter.
+        deadline = start_ns + target_ns
+        while perf_counter_ns() < deadline:
+            pass
+
+        if api == "single":
+            for offset in offsets:
+                request.set_value(offset, value)
+        else:
+            request.set_values({offset: value for offset in offsets})
+
+        timestamps[i] = perf_counter_ns() - start_ns
+
+    return timestamps
+
+
+def percentile(sorted_values, pct):
+    """Percentil nearest-rank (índice ceil(n * pct / 100) - 1) sobre uma lista já ordenada.
+
+    Mesma regra de eeff_ctrl_toradex/stats.py, para que o p99 das ferramentas seja comparável.
+    """
+    if not sorted_values:
+        return 0
+    rank = math.ceil(len(sorted_values) * pct / 100)
+    return sorted_values[min(len(sorted_values) - 1, max(0, rank - 1))]
+
+
+def summarize(edges, timestamps, edges_per_burst=None):
+    """Calcula frequência de toggle atingida e jitter entre bordas (em ns).
+
+    Com edges_per_burst (padrão burst), os intervalos entre rajadas ficam fora da
+    frequência e do jitter e são resumidos à parte em gap_*.
+    """
+    intervals = [timestamps[i] - timestamps[i - 1] for i in range(1, len(timestamps))]
+    expected = [edges[i][0] - edges[i - 1][0] for i in range(1, len(edges))]
+
+    free_running = all(e == 0 for e in expected)
+    if free_running and intervals:
+        # Sem período alvo, o jitter é medido contra o intervalo médio.
+        mean = sum(intervals) / len(intervals)
+        expected = [mean] * len(intervals)
+
+    # O intervalo n termina na borda n + 1; é uma pausa se essa borda abre uma nova rajada
+    is_gap = [bool(edges_per_burst) and (n + 1) % edges_per_burst == 0 for n in range(len(intervals))]
+    toggle_intervals = [actual for actual, gap in zip(intervals, is_gap) if not gap]
+    gap_intervals = [actual for actual, gap in zip(intervals, is_gap) if gap]
+
+    jitter = sorted(abs(actual - target) for actual, target, gap in zip(intervals, expected, is_gap) if not gap)
+    gap_jitter = sorted(abs(actual - target) for actual, target, gap in zip(intervals, expected, is_gap) if gap)
+    duration_ns = timestamps[-1] - timestamps[0] if len(timestamps) > 1 else 0
+    toggle_ns = sum(toggle_intervals)
+
+    summary = {
+        "edges": len(timestamps),
+        "duration_s": duration_ns / 1e9,
+        # Só o tempo dentro das rajadas conta: com pausas, dividir pela duração total
+        # mediria a taxa média do padrão, e não a de toggle atingida
+        "toggle_frequency_hz": len(toggle_intervals) / (toggle_ns / 1e9) / 2 if toggle_ns else 0.0,
+        "edge_interval_mean_ns": toggle_ns / len(toggle_intervals) if toggle_intervals else 0.0,
+        "jitter_p50_ns": percentile(jitter, 50),
+        "jitter_p99_ns": percentile(jitter, 99),
+        "jitter_max_ns": jitter[-1] if jitter else 0,
+    }
+    if edges_per_burst:
+        summary.update({
+            "gaps": len(gap_intervals),
+            "gap_interval_mean_ns": sum(gap_intervals) / len(gap_intervals) if gap_intervals else 0.0,
+            "gap_jitter_p50_ns": percentile(gap_jitter, 50),
+            "gap_jitter_max_ns": gap_jitter[-1] if gap_jitter else 0,
+        })
+    return summary
+
+
+def run_benchmark(args):
+    offsets = list(GPIO_LINE_OFFSETS.values()) if not args.offsets else args.offsets
+    edges = build_pattern(args)
+    apis = ["single", "multi"] if args.api == "both" else [args.api]
+    edges_per_burst = 2 * args.pulses if args.pattern == "burst" else None
+
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "backend": args.backend,
+        "chip": args.chip,
+        "offsets": offsets,
+        "pattern": {
+            "name": args.pattern,
+            "frequency_hz": args.frequency,
+            "duty": args.duty if args.pattern == "pwm" else None,
+            "cycles": args.cycles,
+            "pulses": args.pulses if args.pattern == "burst" else None,
+            "bursts": args.bursts if args.pattern == "burst" else None,
+            "gap_s": args.gap if args.pattern == "burst" else None,
+        },
+        "repeats": args.repeats,
+        "runs": {},
+    }
+
+    with open_line_request(args.backend, args.chip, offsets, args.fake_latency_ns) as request:
+        for api in apis:
+            runs = []
+            for _ in range(args.repeats):
+                timestamps = drive_pattern(request, offsets, edges, api)
+                runs.append(summarize(edges, timestamps, edges_per_burst))
+            # Deixa as linhas desligadas entre as medições
+            request.set_values({offset: VALUE_INACTIVE for offset in offsets})
+            results["runs"][api] = runs
+
+    return results
+
+
+def print_summary(results):
+    for api, runs in results["runs"].items():
+        for n, run in enumerate(runs, 1):
+            print(f"[{api} #{n}] {run['toggle_frequency_hz']:.1f} Hz, "
+                  f"jitter p50={run['jitter_p50_ns'] / 1000:.1f} us "
+                  f"p99={run['jitter_p99_ns'] / 1000:.1f} us "
+                  f"max={run['jitter_max_ns'] / 1000:.1f} us "
+                  f"({run['edges']} bordas em {run['duration_s']:.3f} s)")
+            if "gaps" in run:
+                print(f"[{api} #{n}] pausas: {run['gaps']}, intervalo médio {run['gap_interval_mean_ns'] / 1e6:.3f} ms, "
+                      f"jitter p50={run['gap_jitter_p50_ns'] / 1000:.1f} us "
+                      f"max={run['gap_jitter_max_ns'] / 1000:.1f} us")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de taxa de toggle e jitter das GPIOs via libgpiod.")
+    parser.add_argument("--backend", choices=["gpiod", "fake"], default="gpiod",
+                        help="gpiod: chip real ou gpio-sim; fake: request simulado em memória")
+    parser.add_argument("--chip", default=GPIO_CHIP, help="Caminho do gpiochip (ex: chip do gpio-sim)")
+    parser.add_argument("--offsets", type=int, nargs="+", help="Offsets a acionar (padrão: os 4 do GPIO_LINE_OFFSETS)")
+    parser.add_argument("--pattern", choices=["square", "pwm", "burst"], default="square")
+    parser.add_argument("--frequency", type=float, default=0.0,
+                        help="Frequência alvo em Hz (0 = o mais rápido possível)")
+    parser.add_argument("--duty", type=float, default=0.5, help="Duty cycle do PWM (0-1)")
+    parser.add_argument("--cycles", type=int, default=10000, help="Ciclos para square/pwm")
+    parser.add_argument("--pulses", type=int, default=100, help="Pulsos por burst")
+    parser.add_argument("--bursts", type=int, default=10, help="Quantidade de bursts")
+    parser.add_argument("--gap", type=float, default=0.01, help="Intervalo entre bursts em segundos")
+    parser.add_argument("--api", choices=["single", "multi", "both"], default="both",
+                        help="single: set_value por linha; multi: set_values; both: compara as duas")
+    parser.add_argument("--repeats", type=int, default=3, help="Repetições por API")
+    parser.add_argument("--fake-latency-ns", type=int, default=0,
+                        help="Latência simulada por chamada no backend fake")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_FILE, help="Arquivo JSON de resultados")
+    args = parser.parse_args(argv)
+    if args.pattern in ("pwm", "burst") and args.frequency <= 0:
+        parser.error(f"--pattern {args.pattern} exige --frequency > 0.")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        results = run_benchmark(args)
+    except Exception as e:
+        print(f"Erro no benchmark de GPIO: {e}")
+        return 1
+    except KeyboardInterrupt:
+        print("Benchmark interrompido pelo usuário.")
+        return 1
+
+    print_summary(results)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Resultados salvos em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
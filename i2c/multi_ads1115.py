@@ -0,0 +1,387 @@
+import argparse
+import json
+import math
+import queue
+import sys
+import threading
+import time
+
+# smbus2 só é necessário com os barramentos reais; --fake roda sem ele.
+try:
+    import smbus2
+except ImportError:
+    smbus2 = None
+
+# --- Amostragem paralela de vários ADS1115 em vários barramentos I2C ---
+# Uma thread por barramento: os barramentos trabalham em paralelo e, dentro de cada
+# barramento, os dispositivos são intercalados (todos iniciam a conversão, uma única
+# espera, depois todos são lidos). As amostras de todos os dispositivos/canais são
+# agrupadas em frames alinhados no tempo e exportadas como um único fluxo JSON lines:
+#   {"frame": N, "t": início, "samples": {"i2c-3/0x48/A0": [{"t": ..., "v": ...}, ...], ...}}
+#
+# Exemplo: python3 multi_ads1115.py --device 3:0x48 --device 3:0x49 --device 1:0x4A --channels 0 1
+
+CONFIG_REG = 0x01
+CONVERSION_REG = 0x00
+# Config: OS=1 (inicia), MUX=100+canal (AINx x GND), PGA=001 (±4.096 V), single-shot,
+# DR=111 (860 SPS), comparador desligado. (O 0xC183 de i2c_read.py é ±6.144 V a 128 SPS.)
+CONFIG_SINGLE_SHOT = 0xC3E3
+CONFIG_OS_BIT = 0x8000             # Na leitura: 1 = nenhuma conversão em andamento
+CONVERSION_DELAY_SECONDS = 1 / 860 # Tempo nominal de uma conversão a 860 SPS
+CONVERSION_POLL_SECONDS = 0.0002   # Intervalo entre consultas ao bit OS
+CONVERSION_TIMEOUT_SECONDS = 0.01  # Sem conversão pronta nesse tempo: conta como erro
+FULL_SCALE_VOLTS = 4.096
+ADS1115_ADDRESSES = (0x48, 0x49, 0x4A, 0x4B)
+
+DEFAULT_DEVICES = ["3:0x48"]   # Mesmo dispositivo de i2c_read.py
+DEFAULT_CHANNELS = [0, 1]
+DEFAULT_FRAME_PERIOD_SECONDS = 0.01
+
+
+def bus_path(bus):
+    """Aceita '3' ou '/dev/i2c-3'."""
+    return bus if bus.startswith("/") else f"/dev/i2c-{bus}"
+
+
+def parse_device(spec):
+    """'3:0x48' -> ('/dev/i2c-3', 0x48)."""
+    bus, _, address = spec.rpartition(":")
+    address = int(address, 0)
+    if address not in ADS1115_ADDRESSES:
+        raise argparse.ArgumentTypeError(f"Endereço {address:#04x} inválido para ADS1115 (0x48-0x4B).")
+    return bus_path(bus), address
+
+
+def sample_key(bus, address, channel):
+    return f"{bus.rsplit('/', 1)[-1]}/{address:#04x}/A{channel}"
+
+
+def start_conversion(bus, address, channel):
+    config = CONFIG_SINGLE_SHOT | (channel << 12)
+    bus.write_i2c_block_data(address, CONFIG_REG, [(config >> 8) & 0xFF, config & 0xFF])
+
+
+def wait_conversion(bus, address, deadline):
+    """Consulta o bit OS até a conversão terminar (ler antes devolve o resultado anterior)."""
+    while True:
+        data = bus.read_i2c_block_data(address, CONFIG_REG, 2)
+        if ((data[0] << 8) | data[1]) & CONFIG_OS_BIT:
+            return
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"ADS1115 {address:#04x}: conversão não concluída a tempo")
+        time.sleep(CONVERSION_POLL_SECONDS)
+
+
+def read_conversion(bus, address):
+    bus.write_byte(address, CONVERSION_REG)
+    data = bus.read_i2c_block_data(address, CONVERSION_REG, 2)
+    raw = (data[0] << 8) | data[1]
+    if raw & 0x8000:  # Conversão para número com sinal
+        raw -= 65536
+    return raw * FULL_SCALE_VOLTS / 32768
+
+
+class BusWorker(threading.Thread):
+    """Amostra todos os dispositivos de um barramento e publica (t_ns, bus, addr, canal, volts).
+
+    Ao fim de cada passada publica também (t_ns, bus, None, None, None), a marca d'água do
+    barramento: mesmo com todos os dispositivos falhando, os frames continuam saindo.
+    """
+
+    def __init__(self, path, bus, addresses, channels, out_queue, stop_event):
+        super().__init__(daemon=True, name=f"ads1115-{path}")
+        self.path = path
+        self.bus = bus
+        self.addresses = addresses
+        self.channels = channels
+        self.out_queue = out_queue
+        self.stop_event = stop_event
+        self.samples = 0
+        self.errors = 0
+        self.failing = set() # Dispositivos cuja última operação falhou
+
+    def _error(self, address, e):
+        self.errors += 1
+        if address not in self.failing:
+            # Só a primeira falha de cada dispositivo: um ADS1115 desconectado falha a cada passada
+            print(f"Erro no ADS1115 {address:#04x} em {self.path}: {e}", file=sys.stderr)
+            self.failing.add(address)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            for channel in self.channels:
+                # Inicia a conversão em todos os dispositivos do barramento
+                started = []
+                for address in self.addresses:
+                    try:
+                        start_conversion(self.bus, address, channel)
+                        started.append(address)
+                    except OSError as e:
+                        self._error(address, e)
+                time.sleep(CONVERSION_DELAY_SECONDS)  # Uma espera para todos
+                deadline = time.monotonic() + CONVERSION_TIMEOUT_SECONDS
+
+                for address in started:
+                    try:
+                        wait_conversion(self.bus, address, deadline)
+                        value = read_conversion(self.bus, address)
+                    except OSError as e:
+                        self._error(address, e)
+                        continue
+                    if address in self.failing:
+                        print(f"ADS1115 {address:#04x} em {self.path} respondendo novamente.", file=sys.stderr)
+                        self.failing.discard(address)
+                    self.out_queue.put((time.monotonic_ns(), self.path, address, channel, value))
+                    self.samples += 1
+                self.out_queue.put((time.monotonic_ns(), self.path, None, None, None))
+        # Sinaliza ao agrupador que este barramento terminou
+        self.out_queue.put((None, self.path, None, None, None))
+
+
+class FrameMerger:
+    """Agrupa amostras em frames de frame_period segundos pelo timestamp de cada amostra.
+
+    Um frame só é emitido quando todos os barramentos já publicaram amostras ou marcas
+    d'água posteriores ao fim dele, garantindo que nenhuma amostra atrasada fique de fora.
+    """
+
+    def __init__(self, buses, frame_period_seconds, start_ns):
+        self.period_ns = int(frame_period_seconds * 1e9)
+        self.start_ns = start_ns
+        self.watermarks = {bus: start_ns for bus in buses}
+        self.frames = {}
+        self.next_frame = 0
+
+    def add(self, t_ns, bus, address, channel, value):
+        self.watermarks[bus] = t_ns
+        index = (t_ns - self.start_ns) // self.period_ns
+        if index < self.next_frame:
+            index = self.next_frame  # Não reabre frames já emitidos
+        frame = self.frames.setdefault(index, {})
+        # Lista por chave: com frames mais longos que um ciclo do barramento, o mesmo
+        # canal aparece várias vezes no frame e nenhuma amostra pode ser descartada
+        frame.setdefault(sample_key(bus, address, channel), []).append(
+            {"t": (t_ns - self.start_ns) / 1e9, "v": round(value, 5)})
+
+    def advance(self, bus, t_ns):
+        """Marca d'água sem amostra: o barramento não publicará nada anterior a t_ns."""
+        self.watermarks[bus] = t_ns
+
+    def finish_bus(self, bus):
+        del self.watermarks[bus]
+
+    def ready_frames(self, flush=False):
+        """Devolve (e remove) os frames completos, em ordem."""
+        if flush or not self.watermarks:
+            limit = max(self.frames) + 1 if self.frames else self.next_frame
+        else:
+            limit = (min(self.watermarks.values()) - self.start_ns) // self.period_ns
+        ready = []
+        while self.next_frame < limit:
+            samples = self.frames.pop(self.next_frame, None)
+            if samples:
+                ready.append({
+                    "frame": self.next_frame,
+                    "t": self.next_frame * self.period_ns / 1e9,
+                    "samples": samples,
+                })
+            self.next_frame += 1
+        return ready
+
+
+def group_devices(devices):
+    """[(bus, addr), ...] -> {bus: [addr, ...]} preservando a ordem."""
+    buses = {}
+    for path, address in devices:
+        buses.setdefault(path, [])
+        if address not in buses[path]:
+            buses[path].append(address)
+    return buses
+
+
+def run_sampler(buses, channels, frame_period_seconds, duration_seconds, emit, bus_factory):
+    """Executa a amostragem e chama emit(frame) para cada frame. Retorna as estatísticas."""
+    out_queue = queue.Queue()
+    stop_event = threading.Event()
+    workers = [
+        BusWorker(path, bus_factory(path), addresses, channels, out_queue, stop_event)
+        for path, addresses in buses.items()
+    ]
+
+    start_ns = time.monotonic_ns()
+    merger = FrameMerger(buses.keys(), frame_period_seconds, start_ns)
+    for worker in workers:
+        worker.start()
+
+    frames = 0
+    running = len(workers)
+    deadline = start_ns + int(duration_seconds * 1e9) if duration_seconds else None
+    try:
+        while running:
+            if deadline and time.monotonic_ns() >= deadline:
+                stop_event.set()
+            try:
+                t_ns, path, address, channel, value = out_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            except KeyboardInterrupt:
+                # Para os workers e continua até drenar as amostras pendentes
+                print("Programa encerrado pelo usuário", file=sys.stderr)
+                stop_event.set()
+                continue
+            if t_ns is None:
+                merger.finish_bus(path)
+                running -= 1
+            elif address is None:
+                merger.advance(path, t_ns)
+            else:
+                merger.add(t_ns, path, address, channel, value)
+            for frame in merger.ready_frames():
+                emit(frame)
+                frames += 1
+    finally:
+        stop_event.set()
+        for worker in workers:
+            worker.join(timeout=1)
+            worker.bus.close()
+
+    for frame in merger.ready_frames(flush=True):
+        emit(frame)
+        frames += 1
+
+    elapsed = (time.monotonic_ns() - start_ns) / 1e9
+    samples = sum(worker.samples for worker in workers)
+    return {
+        "elapsed_s": elapsed,
+        "samples": samples,
+        "errors": sum(worker.errors for worker in workers),
+        "per_bus_errors": {worker.path: worker.errors for worker in workers},
+        "frames": frames,
+        "aggregate_rate_sps": samples / elapsed if elapsed else 0.0,
+        "per_bus_rate_sps": {worker.path: worker.samples / elapsed if elapsed else 0.0 for worker in workers},
+    }
+
+
+# Fundo de escala (V) por PGA e amostras/s por DR, como na tabela do datasheet
+PGA_FULL_SCALE_VOLTS = [6.144, 4.096, 2.048, 1.024, 0.512, 0.256, 0.256, 0.256]
+DATA_RATES_SPS = [8, 16, 32, 64, 128, 250, 475, 860]
+
+
+def fake_signal(address, channel, t):
+    """Senoide diferente por dispositivo e canal."""
+    return 2.0 + math.sin(2 * math.pi * (1 + channel) * t + (address - 0x48))
+
+
+class FakeI2CBus:
+    """Barramento I2C falso com vários ADS1115 e latência de transação configurável.
+
+    signal(endereço, canal, t) dá a tensão de cada entrada (padrão: fake_signal). O lock
+    simula o barramento físico: dentro de um barramento as transações são sequenciais.
+    Cada dispositivo modela a conversão single-shot: PGA e DR escritos definem escala e
+    duração (1/DR); até o fim dela o bit OS lê 0, o registrador de conversão mantém o
+    resultado anterior e um novo pedido de conversão é ignorado, como no chip.
+    """
+
+    def __init__(self, addresses, transaction_seconds=0.0002, signal=fake_signal):
+        self.addresses = set(addresses)
+        self.transaction_seconds = transaction_seconds
+        self.signal = signal
+        self.config = {address: 0x8583 for address in addresses} # Valor de reset
+        self.result = {address: 0 for address in addresses}
+        self.converting = {} # endereço -> (canal, fundo de escala, instante em que fica pronta)
+        self.lock = threading.Lock()
+        self.start = time.monotonic()
+
+    def _transaction(self, address):
+        if address not in self.addresses:
+            raise OSError(121, "Remote I/O error")
+        with self.lock:
+            time.sleep(self.transaction_seconds)
+        pending = self.converting.get(address)
+        if pending is not None and time.monotonic() >= pending[2]:
+            # Conversão concluída: o valor no fim dela vai para o registrador
+            channel, full_scale, ready_at = pending
+            volts = self.signal(address, channel, ready_at - self.start) if channel is not None else 0.0
+            raw = int(volts * 32768 / full_scale)
+            self.result[address] = max(-32768, min(32767, raw)) & 0xFFFF
+            del self.converting[address]
+
+    def write_i2c_block_data(self, address, register, data):
+        self._transaction(address)
+        if register != CONFIG_REG or address in self.converting:
+            return
+        config = ((data[0] << 8) | data[1]) & ~CONFIG_OS_BIT
+        self.config[address] = config
+        if data[0] & 0x80:
+            mux = (config >> 12) & 0x07
+            channel = mux - 4 if mux >= 4 else None # Só entradas simples (AINx x GND)
+            full_scale = PGA_FULL_SCALE_VOLTS[(config >> 9) & 0x07]
+            rate = DATA_RATES_SPS[(config >> 5) & 0x07]
+            self.converting[address] = (channel, full_scale, time.monotonic() + 1 / rate)
+
+    def write_byte(self, address, value):
+        self._transaction(address)
+
+    def read_i2c_block_data(self, address, register, length):
+        self._transaction(address)
+        if register == CONFIG_REG:
+            value = self.config[address] | (0 if address in self.converting else CONFIG_OS_BIT)
+        else:
+            value = self.result[address]
+        return [(value >> 8) & 0xFF, value & 0xFF][:length]
+
+    def close(self):
+        pass
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Amostragem paralela de vários ADS1115 em vários barramentos I2C.")
+    parser.add_argument("--device", dest="devices", type=parse_device, action="append",
+                        help="Dispositivo no formato BUS:ENDEREÇO, ex: 3:0x48 (pode repetir)")
+    parser.add_argument("--channels", type=int, nargs="+", default=DEFAULT_CHANNELS, choices=range(4),
+                        help="Canais lidos em cada dispositivo")
+    parser.add_argument("--frame-period", type=float, default=DEFAULT_FRAME_PERIOD_SECONDS,
+                        help="Duração de cada frame em segundos")
+    parser.add_argument("--duration", type=float, default=0.0, help="Tempo de amostragem em segundos (0 = até Ctrl+C)")
+    parser.add_argument("--output", help="Arquivo JSON lines de saída (padrão: stdout)")
+    parser.add_argument("--fake", action="store_true", help="Usa barramentos falsos em vez de /dev/i2c-*")
+    args = parser.parse_args(argv)
+    if not args.devices:
+        args.devices = [parse_device(spec) for spec in DEFAULT_DEVICES]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    buses = group_devices(args.devices)
+
+    if args.fake:
+        bus_factory = lambda path: FakeI2CBus(buses[path])
+    else:
+        if smbus2 is None:
+            print("ERROR: Biblioteca smbus2 não encontrada.")
+            return 1
+        bus_factory = smbus2.SMBus
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    emit = lambda frame: output.write(json.dumps(frame) + "\n")
+
+    try:
+        stats = run_sampler(buses, args.channels, args.frame_period, args.duration, emit, bus_factory)
+    except Exception as e:
+        print(f"ERROR: Erro na amostragem: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"{stats['samples']} amostras em {stats['elapsed_s']:.2f} s "
+          f"({stats['aggregate_rate_sps']:.0f} amostras/s agregadas, {stats['frames']} frames, "
+          f"{stats['errors']} erros)", file=sys.stderr)
+    for path, rate in stats["per_bus_rate_sps"].items():
+        print(f"  {path}: {rate:.0f} amostras/s, {stats['per_bus_errors'][path]} erros", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import time
+import unittest
+
+import multi_ads1115
+
+
+class RunSamplerTest(unittest.TestCase):
+    def run_fake(self, devices, frame_period_seconds, signal=multi_ads1115.fake_signal):
+        buses = multi_ads1115.group_devices([multi_ads1115.parse_device(spec) for spec in devices])
+        frames = []
+        stats = multi_ads1115.run_sampler(
+            buses, [0, 1], frame_period_seconds, 0.3, frames.append,
+            lambda path: multi_ads1115.FakeI2CBus(buses[path], signal=signal))
+        return frames, stats
+
+    def exported_samples(self, frames):
+        return sum(len(samples) for frame in frames for samples in frame["samples"].values())
+
+    def test_every_sample_is_exported(self):
+        # Frame bem mais longo que um ciclo do barramento: vários valores por canal em cada frame
+        frames, stats = self.run_fake(["3:0x48", "3:0x49", "1:0x4A"], 0.05)
+        self.assertGreater(stats["samples"], 0)
+        self.assertEqual(self.exported_samples(frames), stats["samples"])
+        self.assertEqual(len(frames), stats["frames"])
+
+    def test_short_frames(self):
+        frames, stats = self.run_fake(["3:0x48"], 0.001)
+        self.assertEqual(self.exported_samples(frames), stats["samples"])
+
+    def test_frames_are_ordered(self):
+        frames, _ = self.run_fake(["3:0x48", "1:0x49"], 0.01)
+        indexes = [frame["frame"] for frame in frames]
+        self.assertEqual(indexes, sorted(set(indexes)))
+        for frame in frames:
+            for samples in frame["samples"].values():
+                times = [sample["t"] for sample in samples]
+                self.assertEqual(times, sorted(times))
+
+    def test_samples_are_labelled_with_their_channel(self):
+        # Tensão constante e distinta por dispositivo/canal: um resultado de conversão
+        # anterior (outro canal) lido cedo demais apareceria com o valor errado
+        expected = {"0x48/A0": 1.0, "0x48/A1": 2.0, "0x49/A0": 1.5, "0x49/A1": 2.5}
+        signal = lambda address, channel, t: expected[f"{address:#04x}/A{channel}"]
+        frames, stats = self.run_fake(["3:0x48", "3:0x49"], 0.01, signal)
+        self.assertGreater(stats["samples"], 0)
+        for frame in frames:
+            for key, samples in frame["samples"].items():
+                for sample in samples:
+                    self.assertAlmostEqual(sample["v"], expected[key.split("/", 1)[1]], places=3)
+
+    def test_dead_bus_does_not_stall_frames(self):
+        # O único ADS1115 de /dev/i2c-1 não responde (NAK em todo acesso)
+        buses = {"/dev/i2c-3": [0x48], "/dev/i2c-1": [0x4A]}
+        factory = lambda path: multi_ads1115.FakeI2CBus(buses[path] if path == "/dev/i2c-3" else [])
+        start = time.monotonic()
+        arrivals = []
+        stats = multi_ads1115.run_sampler(buses, [0], 0.01, 0.5, lambda frame: arrivals.append(time.monotonic() - start),
+                                          factory)
+        self.assertGreater(len(arrivals), 10)
+        self.assertLess(arrivals[0], 0.2) # Sem esperar o fim da amostragem
+        self.assertGreater(stats["per_bus_errors"]["/dev/i2c-1"], 0)
+        self.assertEqual(stats["per_bus_errors"]["/dev/i2c-3"], 0)
+
+
+class FakeI2CBusTest(unittest.TestCase):
+    def test_early_read_returns_previous_result(self):
+        bus = multi_ads1115.FakeI2CBus([0x48], transaction_seconds=0,
+                                       signal=lambda address, channel, t: 1.0 + channel)
+        # Conversão lenta (128 SPS, ~7.8 ms) no canal 1, lida depois de 1.5 ms
+        config = 0xC383 | (1 << 12)
+        bus.write_i2c_block_data(0x48, multi_ads1115.CONFIG_REG, [config >> 8, config & 0xFF])
+        time.sleep(0.0015)
+        self.assertEqual(multi_ads1115.read_conversion(bus, 0x48), 0.0)
+        deadline = time.monotonic() + multi_ads1115.CONVERSION_TIMEOUT_SECONDS
+        multi_ads1115.wait_conversion(bus, 0x48, deadline)
+        self.assertAlmostEqual(multi_ads1115.read_conversion(bus, 0x48), 2.0, places=3)
+
+
+if __name__ == "__main__":
+    unittest.main()